@@ -0,0 +1,30 @@
+import os
+import threading
+from contextlib import contextmanager
+
+
+# Root of every on-disk cache: extracted text, embeddings, responses, digests, indexes, jobs and metrics.
+CACHE_DIR = os.getenv("RFP_CACHE_DIR", ".cache")
+
+
+def temp_path(path):
+    """A temporary name next to path, unique per process and thread so concurrent writers never share one."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+@contextmanager
+def atomic_write(path, mode="wb", **kwargs):
+    """
+    Open a temporary file next to path and move it over path when the block
+    succeeds, so readers never see a partly written file. On error the
+    temporary file is removed and path is left untouched.
+    """
+    tmp = temp_path(path)
+    try:
+        with open(tmp, mode, **kwargs) as fh:
+            yield fh
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
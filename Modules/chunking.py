@@ -0,0 +1,116 @@
+import os
+import tiktoken
+
+
+# Chunk size and overlap in tokens (cl100k_base, the text-embedding-ada-002 encoding).
+CHUNK_TOKENS = int(os.getenv("RFP_CHUNK_TOKENS", "500"))
+CHUNK_OVERLAP = int(os.getenv("RFP_CHUNK_OVERLAP", "60"))
+
+_encoding = None
+
+
+class _ApproxEncoding:
+    """~4 characters per token; used when the tiktoken BPE file cannot be loaded (offline hosts)."""
+
+    def encode(self, text, disallowed_special=()):
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+def get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"⚠️ tiktoken unavailable ({e.__class__.__name__}); approximating token counts.")
+            _encoding = _ApproxEncoding()
+    return _encoding
+
+
+def count_tokens(text):
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def _split_long_paragraph(text, max_tokens, overlap):
+    """Window a paragraph that is larger than a chunk by itself; yields (char_offset, piece)."""
+    enc = get_encoding()
+    tokens = enc.encode(text, disallowed_special=())
+    step = max(1, max_tokens - overlap)
+    for start in range(0, len(tokens), step):
+        yield len(enc.decode(tokens[:start])), enc.decode(tokens[start:start + max_tokens])
+        if start + max_tokens >= len(tokens):
+            break
+
+
+def chunk_blocks(blocks, source, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP):
+    """
+    Pack (kind, text[, offset]) blocks into LDocument chunks of at most chunk_tokens.
+    A heading always starts a new chunk and is never emitted without body text;
+    paragraphs are never split unless one does not fit the budget (next to its
+    heading, for the first paragraph of a section). Consecutive chunks within a
+    section share up to overlap_tokens of trailing paragraphs.
+    Metadata: source, section (nearest heading), chunk (index) and offset (character
+    offset of the chunk in the extracted document text).
+    """
+    from langchain_core.documents import Document as LDocument  # langchain_core is slow to import
+    chunks = []
+    section = ""
+    current = []  # (offset, text, tokens)
+    offset = 0
+    has_body = False
+
+    def flush(keep_overlap):
+        nonlocal current
+        if not current:
+            return
+        chunks.append(LDocument(
+            page_content="\n".join(text for _, text, _ in current),
+            metadata={"source": source, "section": section, "chunk": len(chunks), "offset": current[0][0]},
+        ))
+        carried, carried_tokens = [], 0
+        if keep_overlap:
+            for item in reversed(current):
+                if carried_tokens + item[2] > overlap_tokens:
+                    break
+                carried.insert(0, item)
+                carried_tokens += item[2]
+            if len(carried) == len(current):
+                carried = []  # never re-emit a whole chunk as overlap
+        current = carried
+
+    for block in blocks:
+        kind, text = block[0], block[1]
+        # Blocks from ExtractedDocument carry their real offset; bare (kind, text) pairs get a running one.
+        block_offset = block[2] if len(block) > 2 else offset
+        offset = block_offset + len(text) + 1
+
+        if kind == "heading":
+            if has_body:
+                flush(keep_overlap=False)
+            has_body = False
+            section = text
+            current = [(block_offset, text, count_tokens(text))]
+            continue
+
+        tokens = count_tokens(text)
+        pieces = [(0, text, tokens)]
+        # A paragraph right after its heading must fit beside it, so the heading never ends up alone.
+        budget = max(1, chunk_tokens - current[0][2]) if current and not has_body else chunk_tokens
+        if tokens > budget:
+            pieces = [(o, p, count_tokens(p))
+                      for o, p in _split_long_paragraph(text, budget, min(overlap_tokens, budget // 4))]
+
+        for piece_offset, piece, piece_tokens in pieces:
+            if has_body and sum(t for _, _, t in current) + piece_tokens > chunk_tokens:
+                flush(keep_overlap=True)
+                if sum(t for _, _, t in current) + piece_tokens > chunk_tokens:
+                    current = []
+            current.append((block_offset + piece_offset, piece, piece_tokens))
+            has_body = True
+
+    if has_body:
+        flush(keep_overlap=False)
+    return chunks
@@ -0,0 +1,137 @@
+import contextvars
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Modules.cache_paths import CACHE_DIR, atomic_write
+from Modules.chunking import chunk_blocks, count_tokens
+from Modules.generation import CHAT_MODEL, DEFAULT_SECTION_TIMEOUT, MAX_CONCURRENT_SECTIONS
+from Modules.llm_client import chat_completion
+from Modules.metrics import observe_cache
+from Modules.prompts import get_rfp_chunk_summary_prompt, get_rfp_digest_prompt
+from Modules.token_budget import section_budget, truncate_tokens
+
+
+DIGEST_DIR = os.path.join(CACHE_DIR, "rfp_digest")
+
+# Map chunks are large (cheap to summarise); the digest is what every section prompt receives.
+CONDENSE_CHUNK_TOKENS = int(os.getenv("RFP_CONDENSE_CHUNK_TOKENS", "3000"))
+DIGEST_TOKENS = int(os.getenv("RFP_DIGEST_TOKENS", "1500"))
+# Bump when the condensation prompts change so stale digests are not reused.
+DIGEST_VERSION = 1
+SUMMARY_SEPARATOR = "\n\n---\n\n"
+
+
+def _complete(prompt, max_tokens, purpose):
+    # Same scaling as generation.SECTION_TIMEOUTS: RFP_SECTION_TIMEOUT per 2000 completion tokens.
+    timeout = DEFAULT_SECTION_TIMEOUT * max_tokens / 2000
+    response = chat_completion(
+        [{"role": "user", "content": prompt}],
+        max_tokens,
+        purpose=purpose,
+        deadline=time.monotonic() + timeout,
+        model=CHAT_MODEL,
+        temperature=0,
+        timeout=timeout
+    )
+    return response.choices[0].message.content.strip()
+
+
+def _reduce_batches(summaries, budget):
+    """
+    Pack summaries, in order, into batches whose joined text fits the budget.
+    Each summary is capped at half the budget, so every batch but the last
+    holds at least two and each round of merging shrinks the list.
+    """
+    cap = max(1, budget // 2 - count_tokens(SUMMARY_SEPARATOR))
+    batches, batch, used = [], [], 0
+    for summary in summaries:
+        tokens = count_tokens(summary)
+        if tokens > cap:
+            summary, tokens = truncate_tokens(summary, cap), cap
+        if batch and used + tokens > budget:
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(summary)
+        used += tokens + count_tokens(SUMMARY_SEPARATOR)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _reduce(summaries, pool):
+    """
+    Merge chunk summaries into one digest. When they do not fit one reduce prompt,
+    batches that fit are merged in parallel and the merged digests reduced again.
+    """
+    max_words = int(DIGEST_TOKENS * 0.7)
+    budget = section_budget("condense_reduce", DIGEST_TOKENS) - count_tokens(get_rfp_digest_prompt("", max_words))
+    batches = _reduce_batches(summaries, budget)
+    while len(batches) > 1:
+        print(f"🗜️ Merging {sum(map(len, batches))} summaries in {len(batches)} batches...")
+        context = contextvars.copy_context()
+        summaries = list(pool.map(
+            lambda b: context.copy().run(
+                _complete, get_rfp_digest_prompt(SUMMARY_SEPARATOR.join(b), max_words), DIGEST_TOKENS, "condense_reduce"
+            ),
+            batches
+        ))
+        batches = _reduce_batches(summaries, budget)
+    return _complete(
+        get_rfp_digest_prompt(SUMMARY_SEPARATOR.join(batches[0] if batches else []), max_words),
+        DIGEST_TOKENS, "condense_reduce"
+    )
+
+
+def file_digest_key(file_bytes):
+    """Cache key for a condensed RFP: SHA-256 of the uploaded bytes plus the digest settings."""
+    sha = hashlib.sha256(file_bytes).hexdigest()
+    return f"{sha}-v{DIGEST_VERSION}-{DIGEST_TOKENS}"
+
+
+def condense_rfp(rfp_text, max_workers=MAX_CONCURRENT_SECTIONS):
+    """
+    Map-reduce summarisation: summarise RFP chunks in parallel, then merge the
+    summaries into one digest of at most DIGEST_TOKENS tokens, in several
+    rounds when the summaries do not fit one reduce prompt.
+    RFPs that already fit in the digest budget are returned unchanged, and the
+    start of the RFP stands in when every chunk summary comes back "None".
+    """
+    if count_tokens(rfp_text) <= DIGEST_TOKENS:
+        return rfp_text.strip()
+
+    paragraphs = [("paragraph", p.strip()) for p in re.split(r"\n\s*\n", rfp_text) if p.strip()]
+    chunks = chunk_blocks(paragraphs, "rfp", chunk_tokens=CONDENSE_CHUNK_TOKENS, overlap_tokens=0)
+    print(f"🗜️ Condensing RFP: {len(chunks)} chunks...")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        context = contextvars.copy_context()
+        summaries = list(pool.map(
+            lambda c: context.copy().run(
+                _complete, get_rfp_chunk_summary_prompt(c.page_content), DIGEST_TOKENS // 2, "condense_map"
+            ),
+            chunks
+        ))
+        summaries = [s for s in summaries if s and s.strip().lower() != "none"]
+        if not summaries:
+            print("🗜️ No chunk had anything relevant; using the start of the RFP as its digest.")
+            return truncate_tokens(rfp_text, DIGEST_TOKENS).strip()
+        return _reduce(summaries, pool)
+
+
+def get_condensed_rfp(rfp_text, file_bytes):
+    """Return the RFP digest, reading it from the on-disk cache keyed by the file hash when present."""
+    path = os.path.join(DIGEST_DIR, file_digest_key(file_bytes) + ".md")
+    if os.path.exists(path):
+        observe_cache("digest", hits=1)
+        with open(path, encoding="utf-8") as fh:
+            return fh.read()
+    observe_cache("digest", misses=1)
+
+    digest = condense_rfp(rfp_text)
+
+    os.makedirs(DIGEST_DIR, exist_ok=True)
+    with atomic_write(path, "w", encoding="utf-8") as fh:
+        fh.write(digest)
+    return digest
@@ -0,0 +1,138 @@
+import re
+from collections import namedtuple
+from xml.sax.saxutils import escape
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Inches, Length
+
+
+HEADER_FILL = "008FD3"  # blue header
+ROW_FILL = "E7EEF7"     # light gray rows
+CELL_WIDTH = int(Inches(3).twips)
+BORDER_COLOR = "FFFFFF"  # white borders for a clean, minimal look
+
+MarkdownTable = namedtuple("MarkdownTable", "headers rows alignments")
+
+_UNESCAPED_PIPE = re.compile(r"(?<!\\)\|")
+_SEPARATOR_CELL = re.compile(r":?-+:?")
+_LINE_BREAK = re.compile(r"<br\s*/?>", re.IGNORECASE)
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Property XML shared by every cell, built once rather than per cell.
+_TBL_BORDERS = "<w:tblBorders>" + "".join(
+    f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="{BORDER_COLOR}"/>'
+    for side in ("top", "left", "bottom", "right", "insideH", "insideV")
+) + "</w:tblBorders>"
+_HEADER_TC_PR = f'<w:tcPr><w:tcW w:w="{CELL_WIDTH}" w:type="dxa"/><w:shd w:val="clear" w:color="auto" w:fill="{HEADER_FILL}"/><w:vAlign w:val="center"/></w:tcPr>'
+_ROW_TC_PR = f'<w:tcPr><w:tcW w:w="{CELL_WIDTH}" w:type="dxa"/><w:shd w:val="clear" w:color="auto" w:fill="{ROW_FILL}"/><w:vAlign w:val="center"/></w:tcPr>'
+_HEADER_R_PR = '<w:rPr><w:b/><w:color w:val="FFFFFF"/></w:rPr>'
+_P_PR = {align: f'<w:pPr><w:jc w:val="{align}"/></w:pPr>' for align in ("left", "center", "right")}
+_HEADER_TR_PR = "<w:trPr><w:tblHeader/></w:trPr>"  # repeat the header row on every page
+
+
+def split_row(line):
+    """Cells of one markdown table row; outer pipes are optional and '\\|' is a literal pipe."""
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in _UNESCAPED_PIPE.split(line)]
+
+
+def _alignment(cell):
+    if cell.endswith(":"):
+        return "center" if cell.startswith(":") else "right"
+    return "left"
+
+
+def parse_markdown_table(lines):
+    """
+    Parse markdown table lines into a MarkdownTable. The alignment row
+    (---, :--, :-:, --:) is optional; rows are padded or cut to the
+    header's column count. Bold markers are stripped from headers.
+    """
+    headers = [h.strip("* ") for h in split_row(lines[0])]
+    alignments = ["left"] * len(headers)
+    body = lines[1:]
+    if body:
+        cells = split_row(body[0])
+        if cells and all(_SEPARATOR_CELL.fullmatch(c.replace(" ", "")) for c in cells):
+            alignments = [_alignment(c.replace(" ", "")) for c in cells][:len(headers)]
+            alignments += ["left"] * (len(headers) - len(alignments))
+            body = body[1:]
+    width = len(headers)
+    rows = []
+    for line in body:
+        cells = split_row(line)[:width]
+        rows.append(cells + [""] * (width - len(cells)))
+    return MarkdownTable(headers, rows, alignments)
+
+
+def _cell_xml(text, tc_pr, p_pr, r_pr=""):
+    text = _INVALID_XML.sub("", str(text).strip())
+    if not text:
+        return f"<w:tc>{tc_pr}<w:p>{p_pr}</w:p></w:tc>"
+    runs = "<w:br/>".join(
+        f'<w:t xml:space="preserve">{escape(part)}</w:t>' for part in _LINE_BREAK.split(text)
+    )
+    return f"<w:tc>{tc_pr}<w:p>{p_pr}<w:r>{r_pr}{runs}</w:r></w:p></w:tc>"
+
+
+def _p_prs(alignments, width):
+    alignments = alignments or ["left"] * width
+    return [_P_PR.get(a, _P_PR["left"]) for a in alignments]
+
+
+def _rows_xml(rows, p_prs):
+    parts = []
+    for row in rows:
+        parts.append("<w:tr>")
+        parts.extend(_cell_xml(value, _ROW_TC_PR, p_prs[i]) for i, value in enumerate(row))
+        parts.append("</w:tr>")
+    return "".join(parts)
+
+
+def build_table(headers, rows, alignments=None, style_id="TableGrid", block_width=None):
+    """
+    Build a styled w:tbl element (blue header row, shaded rows, white borders)
+    directly as XML: the table is assembled as one string and parsed once,
+    so large tables cost one lxml parse instead of thousands of python-docx calls.
+    block_width (twips) sizes the grid columns like Document.add_table() does.
+    """
+    p_prs = _p_prs(alignments, len(headers))
+    grid_width = (block_width or CELL_WIDTH * len(headers)) // max(len(headers), 1)
+
+    parts = [
+        f"<w:tbl {nsdecls('w')}><w:tblPr>",
+        f'<w:tblStyle w:val="{escape(style_id)}"/>' if style_id else "",
+        '<w:tblW w:w="0" w:type="auto"/>', _TBL_BORDERS, '<w:tblLayout w:type="autofit"/>',
+        '<w:tblLook w:val="04A0" w:firstRow="1" w:lastRow="0" w:firstColumn="1" w:lastColumn="0" w:noHBand="0" w:noVBand="1"/>',
+        "</w:tblPr><w:tblGrid>", f'<w:gridCol w:w="{grid_width}"/>' * len(headers), "</w:tblGrid>",
+        "<w:tr>", _HEADER_TR_PR,
+    ]
+    parts.extend(_cell_xml(h, _HEADER_TC_PR, p_prs[i], _HEADER_R_PR) for i, h in enumerate(headers))
+    parts.append("</w:tr>")
+    parts.append(_rows_xml(rows, p_prs))
+    parts.append("</w:tbl>")
+    return parse_xml("".join(parts))
+
+
+def append_rows(tbl, rows, alignments=None):
+    """Append shaded data rows to a table from build_table(), e.g. one chunk of a large inventory at a time."""
+    rows = list(rows)
+    if not rows:
+        return
+    fragment = parse_xml(f"<w:tbl {nsdecls('w')}>{_rows_xml(rows, _p_prs(alignments, len(rows[0])))}</w:tbl>")
+    tbl.extend(list(fragment))
+
+
+def styled_table_element(doc, headers, rows, alignments=None):
+    """build_table() using the document's "Table Grid" style and its body width."""
+    section = doc.sections[-1]
+    block_width = section.page_width - section.left_margin - section.right_margin
+    return build_table(
+        headers, rows, alignments,
+        style_id=doc.styles["Table Grid"].style_id,
+        block_width=Length(block_width).twips
+    )
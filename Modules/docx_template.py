@@ -0,0 +1,188 @@
+import copy
+import os
+import re
+import threading
+from io import BytesIO
+from docx import Document
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.opc.part import XmlPart
+from docx.shared import Pt
+from Modules.docx_tables import parse_markdown_table, styled_table_element
+
+
+PLACEHOLDER_PATTERN = re.compile(r"<<[A-Z0-9_]+>>")
+# Parts that may hold placeholders; only these are copied per render, the rest are shared read-only.
+STORY_PARTS = re.compile(r"/word/(document|header\d*|footer\d*)\.xml")
+
+_templates_lock = threading.Lock()
+_templates = {}
+
+
+def apply_bullet_to_para(paragraph, list_id='1'):
+    """
+    Applies a dot bullet style (list level 0) using its XML structure.
+    Uses numId='1' which is often the default bullet style in templates.
+    """
+    pPr = paragraph._element.get_or_add_pPr()
+    numPr = OxmlElement('w:numPr')
+
+    # Set the list level (0 is the main level)
+    ilvl = OxmlElement('w:ilvl')
+    ilvl.set(qn('w:val'), '0')
+
+    # Set the list ID (Most default templates use ID '1' for the first bullet definition)
+    numId = OxmlElement('w:numId')
+    numId.set(qn('w:val'), list_id)
+
+    numPr.append(ilvl)
+    numPr.append(numId)
+    pPr.append(numPr)
+
+
+def replace_paragraph(doc, para_element, new_text):
+    """Replace a placeholder paragraph with headings, bullets, tables and text built from markdown-ish new_text."""
+    parent = para_element.getparent()
+    idx = parent.index(para_element)
+    parent.remove(para_element)
+
+    lines = [line.strip() for line in new_text.split("\n") if line.strip()]
+    new_elements = []  # collect to insert once
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        # Markdown-style table
+        if line.startswith("|") and "|" in line:
+            table_lines = []
+            while i < len(lines) and lines[i].startswith("|"):
+                table_lines.append(lines[i])
+                i += 1
+            table = parse_markdown_table(table_lines)
+            new_elements.append(styled_table_element(doc, *table))
+            continue
+
+        # Section heading
+        if line.startswith("**") or line.startswith("###"):
+            header_text = line.strip("*# ").rstrip(":")
+            new_para = doc.add_paragraph(header_text)
+            new_para.style = "Table Column Heading"
+            new_para.paragraph_format.space_after = Pt(4)
+            new_elements.append(new_para._element)
+            i += 1
+            continue
+
+        # Markdown bullets (FIXED: Use apply_bullet_to_para for robustness)
+        if line.startswith("- ") or line.startswith("• "):
+            bullet_text = line[2:].strip() if line.startswith("- ") else line[1:].strip()
+            new_para = doc.add_paragraph(bullet_text, style="List Bullet 2")
+            new_para.paragraph_format.left_indent = Pt(18)
+            new_para.paragraph_format.space_after = Pt(2)
+            new_elements.append(new_para._element)
+            i += 1
+            continue
+
+        # Regular text
+        new_para = doc.add_paragraph(line)
+        new_elements.append(new_para._element)
+        i += 1
+
+    if not new_elements and parent.tag == qn("w:tc"):
+        new_elements.append(doc.add_paragraph()._element)  # a table cell must keep one paragraph
+
+    # ⚡️ Insert all new elements once
+    for element in reversed(new_elements):
+        parent.insert(idx, element)
+
+
+def _element_path(element):
+    """Child indices from the part's root element down to element."""
+    path = []
+    parent = element.getparent()
+    while parent is not None:
+        path.append(parent.index(element))
+        element, parent = parent, parent.getparent()
+    return tuple(reversed(path))
+
+
+class CompiledTemplate:
+    """
+    A response template parsed once. Every paragraph holding a <<PLACEHOLDER>>,
+    in the body, table cells, headers or footers, is indexed by part and element
+    path. render() deep-copies only the parts containing placeholders (plus the
+    main document part) and shares the rest, so no file is re-read or unzipped.
+    """
+
+    def __init__(self, template_path):
+        with open(template_path, "rb") as fh:
+            self._package = Document(BytesIO(fh.read())).part.package
+        self.placeholders = {}  # placeholder -> [(partname, element path)]
+        story_parts = []
+        for part in self._package.iter_parts():
+            if not (isinstance(part, XmlPart) and STORY_PARTS.fullmatch(part.partname)):
+                continue
+            found = False
+            for p in part.element.iter(qn("w:p")):
+                text = "".join(t.text or "" for t in p.iter(qn("w:t")))
+                for placeholder in set(PLACEHOLDER_PATTERN.findall(text)):
+                    self.placeholders.setdefault(placeholder, []).append((part.partname, _element_path(p)))
+                    found = True
+            if found or part is self._package.main_document_part:
+                story_parts.append(part)
+        self._copied_parts = {part.partname for part in story_parts}
+        self._shared = {
+            id(part.element): part.element for part in self._package.iter_parts()
+            if isinstance(part, XmlPart) and part.partname not in self._copied_parts
+        }
+
+    def render(self, values):
+        """Return a new Document with each placeholder in values replaced; empty values leave it in place."""
+        package = copy.deepcopy(self._package, dict(self._shared))
+        doc = package.main_document_part.document
+        parts = {part.partname: part for part in package.iter_parts() if part.partname in self._copied_parts}
+
+        locations = {}
+        for placeholder, text in values.items():
+            for location in self.placeholders.get(placeholder, []) if text else []:
+                locations.setdefault(location, text)  # a paragraph holding two placeholders is replaced once
+        # Later paragraphs first, so replacing one never shifts the path of another still to do.
+        for (partname, path), text in sorted(locations.items(), reverse=True):
+            element = parts[partname].element
+            for index in path:
+                element = element[index]
+            replace_paragraph(doc, element, text)
+        return doc
+
+
+def get_compiled_template(template_path):
+    """CompiledTemplate for a path, reparsed only when the file's size or mtime changes."""
+    stat = os.stat(template_path)
+    path, stamp = os.path.abspath(template_path), (stat.st_mtime_ns, stat.st_size)
+    with _templates_lock:
+        cached = _templates.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = _templates[path] = (stamp, CompiledTemplate(template_path))
+        return cached[1]
+
+
+def insert_executive_summary_into_template(
+    template_path,
+    summary_text,
+    objective_text=None,
+    scope_text=None,
+    resource_schedule_text=None,
+    communication_plan_text=None,
+):
+    """
+    Replace placeholders in the template:
+    <<EXEC_SUMMARY>>, <<OBJECTIVE>>, <<SCOPE_TEXT>>, <<RESOURCE_SCHEDULE>>, <<COMMUNICATION_PLAN>>
+    Now includes robust bullet point handling.
+    """
+    return get_compiled_template(template_path).render({
+        "<<EXEC_SUMMARY>>": summary_text,
+        "<<OBJECTIVE>>": objective_text,
+        "<<SCOPE_TEXT>>": scope_text,
+        "<<RESOURCE_SCHEDULE>>": resource_schedule_text,
+        "<<COMMUNICATION_PLAN>>": communication_plan_text,
+    })
@@ -0,0 +1,113 @@
+import re
+import zipfile
+from collections import namedtuple
+from lxml import etree
+
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_P, _TBL, _TR, _TC = W + "p", W + "tbl", W + "tr", W + "tc"
+_T, _TAB, _BR, _CR = W + "t", W + "tab", W + "br", W + "cr"
+_PSTYLE, _VAL, _STYLE, _STYLE_ID, _NAME = W + "pStyle", W + "val", W + "style", W + "styleId", W + "name"
+
+# kind: "heading", "paragraph" or "cell"; part: "header", "body" or "footer".
+# table/row/col locate a cell (table numbers count every table, nested ones included);
+# depth is the table nesting level (0 outside tables).
+DocxBlock = namedtuple("DocxBlock", "kind text part style table row col depth")
+
+
+def _style_names(archive):
+    """styleId -> display name from word/styles.xml (small; parsed in full)."""
+    try:
+        root = etree.fromstring(archive.read("word/styles.xml"))
+    except KeyError:
+        return {}
+    names = {}
+    for style in root.iter(_STYLE):
+        name = style.find(_NAME)
+        names[style.get(_STYLE_ID)] = name.get(_VAL) if name is not None else style.get(_STYLE_ID)
+    return names
+
+
+def _paragraph_text(p):
+    parts = []
+    for node in p.iter(_T, _TAB, _BR, _CR):
+        if node.tag == _T:
+            parts.append(node.text or "")
+        elif node.tag == _TAB:
+            parts.append("\t")
+        else:
+            parts.append("\n")
+    return "".join(parts)
+
+
+def _release(elem):
+    """Free a processed element and its already-processed siblings so memory stays flat."""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _walk_part(stream, part, styles):
+    tables = 0
+    cells = []  # stack of [table, row, col, depth, paragraphs] for open cells
+    rows = []   # stack of [table, row index, col index] for open tables
+
+    context = etree.iterparse(stream, events=("start", "end"), tag=(_P, _TBL, _TR, _TC), huge_tree=True)
+    for event, elem in context:
+        tag = elem.tag
+        if event == "start":
+            if tag == _TBL:
+                tables += 1
+                rows.append([tables, -1, -1])
+            elif tag == _TR:
+                rows[-1][1] += 1
+                rows[-1][2] = -1
+            elif tag == _TC:
+                rows[-1][2] += 1
+                cells.append([rows[-1][0], rows[-1][1], rows[-1][2], len(rows), []])
+            continue
+
+        if tag == _P:
+            text = _paragraph_text(elem)
+            if cells:
+                cells[-1][4].append(text)
+            elif text.strip():
+                style_el = elem.find(f"{W}pPr/{_PSTYLE}")
+                style = styles.get(style_el.get(_VAL), style_el.get(_VAL)) if style_el is not None else ""
+                kind = "heading" if style.lower().startswith(("heading", "title")) else "paragraph"
+                yield DocxBlock(kind, text, part, style, None, None, None, 0)
+        elif tag == _TC:
+            table, row, col, depth, paragraphs = cells.pop()
+            text = "\n".join(p for p in paragraphs if p.strip())
+            yield DocxBlock("cell", text, part, "", table, row, col, depth)
+        elif tag == _TBL:
+            rows.pop()
+        _release(elem)
+
+
+def walk_docx(file):
+    """
+    Stream a DOCX in document order without building python-docx objects:
+    header paragraphs first, then body paragraphs and table cells (nested
+    tables and text boxes included), then footer paragraphs. Repeated
+    header/footer text (first/even/default variants) is emitted once.
+    """
+    with zipfile.ZipFile(file) as archive:
+        styles = _style_names(archive)
+        names = archive.namelist()
+        order = lambda n: int(re.search(r"(\d*)\.xml$", n).group(1) or 0)
+        headers = sorted((n for n in names if re.fullmatch(r"word/header\d*\.xml", n)), key=order)
+        footers = sorted((n for n in names if re.fullmatch(r"word/footer\d*\.xml", n)), key=order)
+
+        for part, members in (("header", headers), ("body", ["word/document.xml"]), ("footer", footers)):
+            seen = set()
+            for member in members:
+                with archive.open(member) as stream:
+                    for block in _walk_part(stream, part, styles):
+                        if part != "body":
+                            if block.text in seen:
+                                continue
+                            seen.add(block.text)
+                        yield block
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+try:
+    import fcntl  # POSIX only; on Windows appends are serialized within one process only
+except ImportError:
+    fcntl = None
+import time
+from contextlib import contextmanager
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from Modules.cache_paths import CACHE_DIR
+from Modules.chunking import count_tokens
+from Modules.metrics import observe_cache, observe_llm
+
+
+EMBEDDING_CACHE_DIR = os.path.join(CACHE_DIR, "embeddings")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves previously seen texts from disk.
+    Vectors are appended to a float32 file read through a NumPy memmap; an
+    index file maps sha256(model, text) to the row number. Only
+    misses are sent to the wrapped client, in one batched call. Appends hold
+    a file lock, so processes sharing the cache (app and batch.py) can write.
+    """
+
+    def __init__(self, inner, model_name, cache_dir=EMBEDDING_CACHE_DIR):
+        self.inner = inner
+        self.model_name = model_name
+        self.directory = os.path.join(cache_dir, model_name.replace("/", "_"))
+        self._vectors_path = os.path.join(self.directory, "vectors.f32")
+        self._keys_path = os.path.join(self.directory, "keys.txt")
+        self._meta_path = os.path.join(self.directory, "meta.json")
+        self._lock_path = os.path.join(self.directory, ".lock")
+        self._lock = threading.Lock()
+        self._index = {}
+        self._dim = None
+        self._matrix = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if not os.path.exists(self._meta_path):
+            return
+        with self._file_lock():
+            with open(self._meta_path, encoding="utf-8") as fh:
+                self._dim = json.load(fh)["dim"]
+            rows = self._aligned_rows()
+            if not os.path.exists(self._keys_path):
+                return
+            with open(self._keys_path, encoding="utf-8") as fh:
+                for line in fh:
+                    key, _, row = line.rstrip("\n").partition("\t")
+                    if row.isdigit() and int(row) < rows:  # skip a torn tail
+                        self._index[key] = int(row)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared with other processes using this cache directory."""
+        with open(self._lock_path, "a") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _aligned_rows(self):
+        """Whole rows in the vector file; a partly written row (crash mid-append) is cut off. Call under the file lock."""
+        if not os.path.exists(self._vectors_path):
+            return 0
+        row_bytes = 4 * self._dim
+        size = os.path.getsize(self._vectors_path)
+        if size % row_bytes:
+            print(f"⚠️ Dropping {size % row_bytes} bytes of a partly written embedding row.")
+            os.truncate(self._vectors_path, size - size % row_bytes)
+        return size // row_bytes
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _rows(self, rows):
+        needed = max(rows) + 1
+        if self._matrix is None or self._matrix.shape[0] < needed:
+            count = os.path.getsize(self._vectors_path) // (4 * self._dim)
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(count, self._dim))
+        return self._matrix[rows]
+
+    def _append(self, keys, vectors):
+        array = np.asarray(vectors, dtype=np.float32)
+        with self._file_lock():
+            if self._dim is None:
+                if os.path.exists(self._meta_path):  # written by another process meanwhile
+                    with open(self._meta_path, encoding="utf-8") as fh:
+                        self._dim = json.load(fh)["dim"]
+                else:
+                    self._dim = array.shape[1]
+                    with open(self._meta_path, "w", encoding="utf-8") as fh:
+                        json.dump({"model": self.model_name, "dim": self._dim}, fh)
+            # Rows go at the last whole row, wherever other processes or a crash left the file's end.
+            start = self._aligned_rows()
+            with open(self._vectors_path, "r+b" if start else "wb") as fh:
+                fh.seek(start * 4 * self._dim)
+                fh.write(array.tobytes())
+            # Keys are written after their vectors, so a crash never indexes a missing row.
+            with open(self._keys_path, "a", encoding="utf-8") as fh:
+                fh.write("".join(f"{key}\t{start + offset}\n" for offset, key in enumerate(keys)))
+        for offset, key in enumerate(keys):
+            self._index[key] = start + offset
+
+    def _embed(self, texts, embed_misses):
+        keys = [self._key(t) for t in texts]
+        with self._lock:
+            missing = list(dict.fromkeys(k for k in keys if k not in self._index))
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        observe_cache("embedding", hits=len(keys) - len(missing), misses=len(missing))
+
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            batch = [text_by_key[k] for k in missing]
+            started = time.perf_counter()
+            try:
+                vectors = embed_misses(batch)
+            except Exception:
+                observe_llm("embeddings", "embeddings", time.perf_counter() - started, status="error")
+                raise
+            observe_llm("embeddings", "embeddings", time.perf_counter() - started,
+                        sum(count_tokens(t) for t in batch), estimated=True)
+            with self._lock:
+                fresh = [(k, v) for k, v in zip(missing, vectors) if k not in self._index]
+                if fresh:
+                    self._append([k for k, _ in fresh], [v for _, v in fresh])
+
+        with self._lock:
+            return self._rows([self._index[k] for k in keys]).tolist()
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        return self._embed(list(texts), self.inner.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed([text], lambda misses: [self.inner.embed_query(misses[0])])[0]
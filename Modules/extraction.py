@@ -0,0 +1,200 @@
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from io import BytesIO
+from Modules.docx_walker import walk_docx
+
+
+# PDFs with fewer pages than this are extracted in-process; the pool only pays off on big files.
+PARALLEL_MIN_PAGES = int(os.getenv("RFP_PDF_PARALLEL_MIN_PAGES", "24"))
+PAGES_PER_TASK = int(os.getenv("RFP_PDF_PAGES_PER_TASK", "8"))
+EXTRACT_WORKERS = int(os.getenv("RFP_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def _get_pool():
+    """Shared process pool; forkserver avoids forking the threaded Streamlit server."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=context)
+    return _pool
+
+
+def _discard_pool(pool):
+    """Drop a broken pool (a worker crashed) so the next large PDF starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def read_file_bytes(file):
+    """Bytes of an uploaded file (Streamlit UploadedFile) or an open binary file."""
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+def file_size(file):
+    """Size in bytes of an uploaded or open binary file, without reading it."""
+    position = file.tell()
+    size = file.seek(0, os.SEEK_END)
+    file.seek(position)
+    return size
+
+
+def _extract_page_range(pdf_path, start, stop):
+    """Process-pool worker: extract the text of pages [start, stop)."""
+    from PyPDF2 import PdfReader
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(file, on_progress=None):
+    """
+    Yield the text of each PDF page in order. Large PDFs are split into page
+    ranges extracted on the shared process pool (RFP_EXTRACT_WORKERS processes;
+    1 extracts in-process); pages are yielded as soon as every
+    earlier range is done, so later stages can start early. If a worker crashes
+    (e.g. on a malformed page), the pool is replaced and the remaining pages
+    are extracted in-process. on_progress(pages_done, total_pages) is called from the caller's thread.
+    """
+    from PyPDF2 import PdfReader
+    pdf_bytes = read_file_bytes(file)
+    reader = PdfReader(BytesIO(pdf_bytes))
+    total = len(reader.pages)
+
+    if total < PARALLEL_MIN_PAGES or EXTRACT_WORKERS <= 1:
+        for i, page in enumerate(reader.pages):
+            yield page.extract_text() or ""
+            if on_progress:
+                on_progress(i + 1, total)
+        return
+
+    # Workers read the PDF from a temp file rather than receiving the bytes with every task.
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(pdf_bytes)
+
+    pool = _get_pool()
+    futures = []
+    done = 0
+    try:
+        try:
+            futures = [
+                pool.submit(_extract_page_range, pdf_path, start, min(start + PAGES_PER_TASK, total))
+                for start in range(0, total, PAGES_PER_TASK)
+            ]
+            for future in futures:
+                for text in future.result():
+                    yield text
+                    done += 1
+                if on_progress:
+                    on_progress(done, total)
+        except BrokenProcessPool:
+            print(f"⚠️ PDF extraction worker crashed; extracting the remaining {total - done} pages in-process.")
+            _discard_pool(pool)
+            for i in range(done, total):
+                yield reader.pages[i].extract_text() or ""
+                if on_progress:
+                    on_progress(i + 1, total)
+    finally:
+        for future in futures:
+            future.cancel()
+        for future in futures:
+            if not future.cancelled():
+                future.exception()  # wait for running tasks before removing their input
+        os.remove(pdf_path)
+
+
+@dataclass
+class ExtractedDocument:
+    """
+    Extracted text plus the structure later stages reuse without re-parsing:
+    pages are [start, end) character spans (PDF only) and blocks are
+    [kind, start, end] spans, kind being "heading", "paragraph" or "row"
+    (a DOCX table row with cells joined by " | ").
+    """
+    text: str
+    pages: list = field(default_factory=list)
+    blocks: list = field(default_factory=list)
+
+    def iter_blocks(self):
+        """Yield (kind, text, offset) for every block in reading order."""
+        for kind, start, end in self.blocks:
+            yield kind, self.text[start:end], start
+
+
+def _paragraph_spans(text, base):
+    """[start, end) spans of the non-blank, blank-line separated paragraphs of text, shifted by base."""
+    spans = []
+    for match in re.finditer(r"\S(?:.*?\S)?(?=\n\s*\n|\s*$)", text, re.S):
+        spans.append([base + match.start(), base + match.end()])
+    return spans
+
+
+def extract_document(file, on_progress=None):
+    """Extract a PDF or DOCX into an ExtractedDocument."""
+    if file.name.endswith(".pdf"):
+        parts, pages, blocks = [], [], []
+        offset = 0
+        for page_text in iter_pdf_pages(file, on_progress):
+            pages.append([offset, offset + len(page_text)])
+            blocks.extend(["paragraph", start, end] for start, end in _paragraph_spans(page_text, offset))
+            parts.append(page_text)
+            offset += len(page_text) + 1
+        return ExtractedDocument("\n".join(parts), pages, blocks)
+
+    elif file.name.endswith(".docx"):
+        parts, blocks = [], []
+        offset = 0
+
+        def add(kind, text):
+            nonlocal offset
+            blocks.append([kind, offset, offset + len(text)])
+            parts.append(text)
+            offset += len(text) + 1
+
+        # Cells of one table row become a single "a | b | c" row block so rows keep their context.
+        row_key, row_cells = None, []
+        for block in walk_docx(BytesIO(read_file_bytes(file))):
+            if block.kind == "cell":
+                key = (block.part, block.table, block.row)
+                if key != row_key and any(row_cells):
+                    add("row", " | ".join(c for c in row_cells if c))
+                if key != row_key:
+                    row_key, row_cells = key, []
+                row_cells.append(" ".join(block.text.split()))
+                continue
+            if any(row_cells):
+                add("row", " | ".join(c for c in row_cells if c))
+            row_key, row_cells = None, []
+            add(block.kind, block.text.strip())
+        if any(row_cells):
+            add("row", " | ".join(c for c in row_cells if c))
+        return ExtractedDocument("\n".join(parts), [], blocks)
+
+    return ExtractedDocument("")
+
+
+def extract_text(file, on_progress=None):
+    """Extract text from PDF or DOCX"""
+    return extract_document(file, on_progress).text
+
+
+def extract_blocks(file):
+    """Yield (kind, text, offset) blocks in reading order; see ExtractedDocument."""
+    return extract_document(file).iter_blocks()
@@ -0,0 +1,319 @@
+import contextvars
+import json
+import os
+import re
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from Modules import response_cache
+from Modules.llm_client import chat_completion
+from Modules.metrics import observe_cache
+from Modules.token_budget import assemble_prompt
+from Modules.prompts import (
+    get_combined_sections_prompt,
+    get_executive_summary_and_objective_prompt,
+    get_scope_prereq_assumptions_prompt,
+    get_resource_schedule_and_commercial_prompt,
+    get_communication_plan_prompt
+)
+
+
+CHAT_MODEL = "Codetest"
+TEMPERATURE = 0.3
+
+# Cap on simultaneous completion calls; keep below the deployment's rate limit.
+MAX_CONCURRENT_SECTIONS = int(os.getenv("RFP_MAX_CONCURRENT_SECTIONS", "4"))
+
+# How often streamed partial output is pushed to the UI.
+STREAM_REFRESH_SECONDS = 0.25
+
+# Completion budget per section; the prompt budget is whatever the context window leaves.
+SECTION_MAX_TOKENS = {
+    "exec_summary": 2000,
+    "scope": 1200,
+    "resource_schedule": 2000,
+    "communication_plan": 2500,
+}
+
+# Per-section timeouts (seconds): RFP_SECTION_TIMEOUT is for a 2000-token section, and the others
+# scale with their completion budget, so longer sections get more headroom.
+DEFAULT_SECTION_TIMEOUT = float(os.getenv("RFP_SECTION_TIMEOUT", "180"))
+SECTION_TIMEOUTS = {key: DEFAULT_SECTION_TIMEOUT * tokens / 2000 for key, tokens in SECTION_MAX_TOKENS.items()}
+
+# "parallel": one streamed request per section, for the lowest latency. "combined": one structured-output
+# request for every section, for the fewest requests and prompt tokens on low-quota deployments.
+GENERATION_MODES = ("parallel", "combined")
+GENERATION_MODE = os.getenv("RFP_GENERATION_MODE", "parallel")
+COMBINED_MAX_TOKENS = int(os.getenv("RFP_COMBINED_MAX_TOKENS", str(sum(SECTION_MAX_TOKENS.values()))))
+COMBINED_TIMEOUT = float(os.getenv("RFP_COMBINED_TIMEOUT", str(2 * DEFAULT_SECTION_TIMEOUT)))
+# "json_schema" needs API version 2024-08-01-preview or later and a model that supports it; "json_object" is older.
+COMBINED_RESPONSE_FORMAT = os.getenv("RFP_COMBINED_RESPONSE_FORMAT", "json_schema")
+
+# Field of the combined answer -> section it belongs to.
+COMBINED_FIELDS = {
+    "exec_summary": "exec_summary",
+    "objective": "exec_summary",
+    "scope": "scope",
+    "resource_schedule": "resource_schedule",
+    "communication_plan": "communication_plan",
+}
+COMBINED_SCHEMA = {
+    "name": "proposal_sections",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {name: {"type": "string"} for name in COMBINED_FIELDS},
+        "required": list(COMBINED_FIELDS),
+        "additionalProperties": False,
+    },
+}
+
+
+def _chat_completion(prompt, max_tokens, timeout=None, regenerate=False, on_delta=None, purpose="chat"):
+    """
+    Run one completion, served from the on-disk response cache unless regenerate is set.
+    With on_delta, the completion is streamed and on_delta(text_so_far) is called as tokens arrive.
+    timeout bounds the whole completion, retries and streaming included (TimeoutError).
+    """
+    key = response_cache.cache_key(prompt, CHAT_MODEL, TEMPERATURE, max_tokens)
+    if not regenerate:
+        cached = response_cache.get(key)
+        if cached is not None:
+            observe_cache("response", hits=1)
+            if on_delta:
+                on_delta(cached)
+            return cached
+    observe_cache("response", misses=1)
+
+    response = chat_completion(
+        [{"role": "user", "content": prompt}],
+        max_tokens,
+        purpose=purpose,
+        deadline=time.monotonic() + timeout if timeout else None,
+        model=CHAT_MODEL,
+        temperature=TEMPERATURE,
+        timeout=timeout,
+        stream=on_delta is not None
+    )
+
+    if on_delta is None:
+        content = response.choices[0].message.content.strip()
+    else:
+        content = ""
+        for chunk in response:
+            # Azure sends a leading chunk with no choices (prompt filter results).
+            if chunk.choices and chunk.choices[0].delta.content:
+                content += chunk.choices[0].delta.content
+                on_delta(content)
+        content = content.strip()
+
+    response_cache.put(key, content)
+    return content
+
+
+def generate_exec_summary_and_objective(reference_passages, condensed_rfp, num_interfaces=113, timeout=None, regenerate=False, on_delta=None):
+    prompt = assemble_prompt(
+        get_executive_summary_and_objective_prompt, "exec_summary",
+        reference_passages, condensed_rfp, SECTION_MAX_TOKENS["exec_summary"], num_interfaces
+    )
+
+    full_output = _chat_completion(prompt, SECTION_MAX_TOKENS["exec_summary"], timeout, regenerate, on_delta, "exec_summary")
+
+    # --- Split into Executive Summary and Objective ---
+    exec_match = re.search(r"\*\*?Executive Summary\*\*?\s*(.*?)\s*(?=\*\*?Objective\*\*?)", full_output, re.S | re.I)
+    obj_match = re.search(r"\*\*?Objective\*\*?\s*(.*)", full_output, re.S | re.I)
+
+    exec_text = exec_match.group(1).strip() if exec_match else full_output
+    obj_text = obj_match.group(1).strip() if obj_match else ""
+
+    return exec_text, obj_text
+
+def generate_scope_sections(reference_passages, condensed_rfp, num_interfaces=None, timeout=None, regenerate=False, on_delta=None):
+    prompt = assemble_prompt(
+        get_scope_prereq_assumptions_prompt, "scope",
+        reference_passages, condensed_rfp, SECTION_MAX_TOKENS["scope"], num_interfaces
+    )
+
+    return _chat_completion(prompt, SECTION_MAX_TOKENS["scope"], timeout, regenerate, on_delta, "scope")
+
+def generate_resource_schedule_and_commercial(reference_passages, condensed_rfp, timeout=None, regenerate=False, on_delta=None):
+    prompt = assemble_prompt(
+        get_resource_schedule_and_commercial_prompt, "resource_schedule",
+        reference_passages, condensed_rfp, SECTION_MAX_TOKENS["resource_schedule"]
+    )
+
+    return _chat_completion(prompt, SECTION_MAX_TOKENS["resource_schedule"], timeout, regenerate, on_delta, "resource_schedule")
+
+def generate_communication_plan(reference_passages, condensed_rfp, timeout=None, regenerate=False, on_delta=None):
+    prompt = assemble_prompt(
+        get_communication_plan_prompt, "communication_plan",
+        reference_passages, condensed_rfp, SECTION_MAX_TOKENS["communication_plan"]
+    )
+
+    return _chat_completion(prompt, SECTION_MAX_TOKENS["communication_plan"], timeout, regenerate, on_delta, "communication_plan")
+
+
+# Section key -> (display label, generator, takes num_interfaces)
+SECTIONS = {
+    "exec_summary": ("Executive Summary & Objective", generate_exec_summary_and_objective, True),
+    "scope": ("Scope, Assumptions and Prerequisites", generate_scope_sections, True),
+    "resource_schedule": ("Resource Schedule and Commercials", generate_resource_schedule_and_commercial, False),
+    "communication_plan": ("Communication Plan", generate_communication_plan, False),
+}
+
+
+def generate_sections_concurrently(reference_passages, condensed_rfp, num_interfaces=None,
+                                   sections=None, max_workers=MAX_CONCURRENT_SECTIONS, regenerate=(),
+                                   on_delta=None):
+    """
+    Run the section generators on a bounded thread pool.
+    reference_passages are retrieved passages in relevance order; each prompt keeps as many as fit its budget.
+    Sections listed in regenerate bypass the response cache.
+    Yields (key, label, result, error) in completion order, in the caller's thread,
+    so Streamlit widgets can be updated as each section lands. With on_delta, sections
+    are streamed and on_delta(key, text_so_far) is also called in the caller's thread.
+    """
+    sections = sections or list(SECTIONS)
+    updates = queue.Queue()
+
+    def publish(key):
+        return lambda text: updates.put((key, text))
+
+    def drain():
+        latest = {}
+        while True:
+            try:
+                key, text = updates.get_nowait()
+            except queue.Empty:
+                break
+            latest[key] = text  # only the newest partial text per section matters
+        for key, text in latest.items():
+            on_delta(key, text)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sections)))) as pool:
+        futures = {}
+        for key in sections:
+            label, func, takes_interfaces = SECTIONS[key]
+            args = (reference_passages, condensed_rfp, num_interfaces) if takes_interfaces else (reference_passages, condensed_rfp)
+            timeout = SECTION_TIMEOUTS.get(key, DEFAULT_SECTION_TIMEOUT)
+            # Each task runs in a copy of the caller's context so its metrics count towards the caller's run.
+            futures[pool.submit(
+                contextvars.copy_context().run, func, *args, timeout=timeout, regenerate=key in regenerate,
+                on_delta=publish(key) if on_delta else None
+            )] = key
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=STREAM_REFRESH_SECONDS, return_when=FIRST_COMPLETED)
+            if on_delta:
+                drain()
+            for future in done:
+                key = futures[future]
+                try:
+                    yield key, SECTIONS[key][0], future.result(), None
+                except Exception as e:
+                    print(f"⚠️ Section '{key}' failed: {e}")
+                    yield key, SECTIONS[key][0], None, e
+
+
+def parse_combined_sections(content):
+    """
+    Validate a combined answer and split it into results shaped like the
+    per-section generators' ((summary, objective) for exec_summary, else text).
+    Returns (sections, errors), errors mapping each unusable section to the reason.
+    """
+    try:
+        data = json.loads(content)
+    except ValueError as e:
+        return {}, {key: f"invalid JSON ({e})" for key in SECTIONS}
+    if not isinstance(data, dict):
+        return {}, {key: "answer is not a JSON object" for key in SECTIONS}
+
+    sections, errors = {}, {}
+    for key in SECTIONS:
+        fields = [name for name, section in COMBINED_FIELDS.items() if section == key]
+        bad = [name for name in fields if not isinstance(data.get(name), str) or not data[name].strip()]
+        if bad:
+            errors[key] = f"missing or empty {', '.join(bad)}"
+        elif key == "exec_summary":
+            sections[key] = (data["exec_summary"].strip(), data["objective"].strip())
+        else:
+            sections[key] = data[key].strip()
+    return sections, errors
+
+
+def generate_combined_sections(reference_passages, condensed_rfp, num_interfaces=None, regenerate=False):
+    """
+    Generate every section in one structured-output request; the reference
+    passages and RFP are sent once. Only a fully valid answer is cached.
+    Returns (sections, errors) as parse_combined_sections does.
+    """
+    prompt = assemble_prompt(
+        get_combined_sections_prompt, "combined",
+        reference_passages, condensed_rfp, COMBINED_MAX_TOKENS, num_interfaces
+    )
+    key = response_cache.cache_key(prompt, CHAT_MODEL, TEMPERATURE, COMBINED_MAX_TOKENS)
+    if not regenerate:
+        cached = response_cache.get(key)
+        if cached is not None:
+            observe_cache("response", hits=1)
+            return parse_combined_sections(cached)
+    observe_cache("response", misses=1)
+
+    if COMBINED_RESPONSE_FORMAT == "json_schema":
+        response_format = {"type": "json_schema", "json_schema": COMBINED_SCHEMA}
+    else:
+        response_format = {"type": "json_object"}
+    response = chat_completion(
+        [{"role": "user", "content": prompt}],
+        COMBINED_MAX_TOKENS,
+        purpose="combined",
+        deadline=time.monotonic() + COMBINED_TIMEOUT,
+        model=CHAT_MODEL,
+        temperature=TEMPERATURE,
+        timeout=COMBINED_TIMEOUT,
+        response_format=response_format
+    )
+    choice = response.choices[0]
+    sections, errors = parse_combined_sections(choice.message.content or "")
+    if errors and choice.finish_reason == "length":
+        errors = {k: f"{reason}; answer cut off at {COMBINED_MAX_TOKENS} tokens" for k, reason in errors.items()}
+    if not errors:
+        response_cache.put(key, choice.message.content)
+    return sections, errors
+
+
+def generate_sections(reference_passages, condensed_rfp, num_interfaces=None, regenerate=(), on_delta=None,
+                      mode=GENERATION_MODE):
+    """
+    Generate the proposal sections in the given mode, yielding (key, label, result, error)
+    like generate_sections_concurrently. In combined mode, sections listed in regenerate,
+    and any the combined answer lacks (all of them if the request fails), fall back to
+    their own calls.
+    """
+    if mode not in GENERATION_MODES:
+        raise ValueError(f"Unknown generation mode {mode!r}; expected one of {', '.join(GENERATION_MODES)}")
+    if mode == "parallel":
+        yield from generate_sections_concurrently(
+            reference_passages, condensed_rfp, num_interfaces, regenerate=regenerate, on_delta=on_delta
+        )
+        return
+
+    fallback = [key for key in SECTIONS if key in regenerate]
+    wanted = [key for key in SECTIONS if key not in regenerate]
+    if wanted:
+        try:
+            sections, errors = generate_combined_sections(reference_passages, condensed_rfp, num_interfaces)
+        except Exception as e:
+            sections, errors = {}, {key: f"{e.__class__.__name__}: {e}" for key in wanted}
+        for key in wanted:
+            if key in sections:
+                yield key, SECTIONS[key][0], sections[key], None
+            else:
+                print(f"⚠️ Combined answer unusable for '{key}' ({errors[key]}); generating it separately.")
+                fallback.append(key)
+    if fallback:
+        yield from generate_sections_concurrently(
+            reference_passages, condensed_rfp, num_interfaces, sections=fallback, regenerate=regenerate,
+            on_delta=on_delta
+        )
@@ -0,0 +1,192 @@
+import codecs
+import csv
+import hashlib
+import io
+import os
+import re
+from dataclasses import dataclass, field
+from Modules.docx_tables import append_rows, styled_table_element
+
+
+INVENTORY_EXTENSIONS = (".csv", ".xlsx")
+# Rows read, normalised and rendered per batch; bounds the temporary lists and XML strings.
+CHUNK_ROWS = int(os.getenv("RFP_INVENTORY_CHUNK_ROWS", "2000"))
+APPENDIX_TITLE = "Appendix: Integration Configuration Objects (ICOs)"
+
+# Canonical appendix columns, in table order, with the export headers that map onto them.
+INVENTORY_COLUMNS = [
+    ("ico", "ICO", ["ico", "ico name", "integration configuration object", "interface name", "scenario", "name"]),
+    ("sender", "Sender", ["sender", "sender component", "sender system", "sender business system",
+                          "sender service", "source system", "source"]),
+    ("interface", "Interface", ["interface", "sender interface", "service interface", "outbound interface",
+                                "message interface"]),
+    ("namespace", "Namespace", ["namespace", "sender namespace", "interface namespace"]),
+    ("receiver", "Receiver", ["receiver", "receiver component", "receiver system", "receiver business system",
+                              "receiver service", "target system", "target"]),
+    ("adapter", "Sender Adapter", ["adapter", "adapter type", "sender adapter", "sender adapter type"]),
+    ("receiver_adapter", "Receiver Adapter", ["receiver adapter", "receiver adapter type"]),
+]
+_ALIASES = {alias: key for key, _, aliases in INVENTORY_COLUMNS for alias in aliases}
+_LABELS = {key: label for key, label, _ in INVENTORY_COLUMNS}
+
+
+@dataclass
+class IcoInventory:
+    """Normalised, de-duplicated inventory rows (tuples in column order) and read statistics."""
+    columns: list
+    rows: list = field(default_factory=list)
+    rows_read: int = 0
+    duplicates: int = 0
+
+    @property
+    def count(self):
+        return len(self.rows)
+
+
+def _header_key(name):
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", str(name or "").lower()).split())
+
+
+def _clean(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return " ".join(str(value).split())
+
+
+def _iter_csv_chunks(file, chunk_rows, encoding=None):
+    """
+    Yield lists of raw CSV rows, streamed from file. Without an encoding, UTF-8
+    (with BOM) is decoded strictly, so a bad byte anywhere in the file raises
+    UnicodeDecodeError, unless the first 64 KiB already rule it out (cp1252).
+    """
+    file.seek(0)
+    head = file.read(1 << 16)
+    file.seek(0)
+    if encoding is None:
+        encoding = "utf-8-sig"
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        except UnicodeDecodeError:
+            encoding = "cp1252"  # Excel's default "CSV" export on Windows
+    sample = head.decode(encoding, errors="ignore")
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    text = io.TextIOWrapper(file, encoding=encoding, newline="",
+                            errors="strict" if encoding == "utf-8-sig" else "replace")
+    try:
+        chunk = []
+        for row in csv.reader(text, dialect):
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        text.detach()  # the caller owns file; closing the wrapper would close it
+
+
+def _iter_xlsx_chunks(file, chunk_rows):
+    """Yield lists of raw rows from the first worksheet, read in openpyxl's streaming mode."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise RuntimeError("Reading .xlsx inventories needs openpyxl (pip install openpyxl).") from e
+    file.seek(0)
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        chunk = []
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def read_inventory(file, chunk_rows=CHUNK_ROWS):
+    """
+    Read an ICO inventory export (CSV or XLSX; an UploadedFile or open binary
+    file with a .name) in chunks. The first non-empty row is the header; known
+    column names are mapped onto INVENTORY_COLUMNS (if none match, every column
+    is kept as is). Whitespace is collapsed and rows that repeat an earlier one,
+    compared case-insensitively, are dropped.
+    """
+    name = file.name.lower()
+    if not name.endswith(INVENTORY_EXTENSIONS):
+        raise ValueError(f"Unsupported inventory format: {os.path.basename(file.name)} (expected CSV or XLSX)")
+    if name.endswith(".xlsx"):
+        return _collect_rows(file, _iter_xlsx_chunks(file, chunk_rows))
+    try:
+        return _collect_rows(file, _iter_csv_chunks(file, chunk_rows))
+    except UnicodeDecodeError:
+        # Not UTF-8 after all (the bad byte came after the sniffed head): start over as cp1252.
+        return _collect_rows(file, _iter_csv_chunks(file, chunk_rows, encoding="cp1252"))
+
+
+def _collect_rows(file, chunks):
+    """Map the header, then normalise and de-duplicate the rows of chunks into an IcoInventory."""
+    inventory, picks, seen = None, None, set()
+    for chunk in chunks:
+        for raw in chunk:
+            values = [_clean(v) for v in raw]
+            if not any(values):
+                continue
+            if inventory is None:
+                keys = [_ALIASES.get(_header_key(v)) for v in values]
+                # First matching header wins when an export has e.g. both "Sender" and "Sender Component".
+                by_key = {}
+                for index, key in enumerate(keys):
+                    if key and key not in by_key:
+                        by_key[key] = index
+                if by_key:
+                    columns = [key for key, _, _ in INVENTORY_COLUMNS if key in by_key]
+                    picks = [by_key[key] for key in columns]
+                    labels = [_LABELS[key] for key in columns]
+                else:
+                    picks = [i for i, v in enumerate(values) if v]
+                    labels = [values[i] for i in picks]
+                inventory = IcoInventory(labels)
+                continue
+
+            inventory.rows_read += 1
+            row = tuple(values[i] if i < len(values) else "" for i in picks)
+            if not any(row):
+                continue
+            # A 16-byte digest per row, so the de-duplication set does not hold a second copy of the inventory.
+            key = hashlib.blake2b("\x1f".join(row).casefold().encode("utf-8"), digest_size=16).digest()
+            if key in seen:
+                inventory.duplicates += 1
+                continue
+            seen.add(key)
+            inventory.rows.append(row)
+
+    if inventory is None:
+        raise ValueError(f"{os.path.basename(file.name)} has no header row.")
+    return inventory
+
+
+def append_ico_appendix(doc, inventory, chunk_rows=CHUNK_ROWS):
+    """
+    Append the appendix heading, a one-line summary and the numbered ICO table
+    to the end of doc. The table XML is built chunk_rows rows at a time.
+    """
+    doc.add_paragraph(APPENDIX_TITLE, style="Heading 1" if "Heading 1" in doc.styles else None)
+    summary = doc.add_paragraph(f"{inventory.count} Integration Configuration Objects are in scope for migration.")
+
+    headers = ["No."] + inventory.columns
+    numbered = lambda start: [(str(start + i + 1),) + row for i, row in enumerate(inventory.rows[start:start + chunk_rows])]
+    table = styled_table_element(doc, headers, numbered(0))
+    # Insert before appending the remaining chunks: lxml moves a large subtree between
+    # documents in quadratic time, while row-sized moves into the placed table stay linear.
+    summary._p.addnext(table)
+    for start in range(chunk_rows, inventory.count, chunk_rows):
+        append_rows(table, numbered(start))
+    return table
@@ -0,0 +1,56 @@
+import re
+from collections import namedtuple
+
+
+# ICO mentions take priority over the general integration terms.
+PRIORITY_KEYWORDS = ["ICOs?", "iCos?", "integration configuration objects?"]
+GENERAL_KEYWORDS = [
+    "interfaces?", "integration points?", "flows?", "connections?",
+    "touchpoints?", "IFlows?", "mappings?", "adapters?"
+]
+SNIPPET_CHARS = 60
+
+# One alternation classifies both kinds in a single pass. The pattern starts with a
+# bare digit class so the regex engine can skip ahead to digits; the leading word
+# boundary and number shape ("1,700" or up to five digits) are checked in Python.
+# Commas are matched in place instead of being stripped from the text.
+_PATTERN = re.compile(
+    r"(?P<number>[0-9][0-9,]*)\s*"
+    r"(?:(?P<ico>" + "|".join(PRIORITY_KEYWORDS) + r")|(?P<general>" + "|".join(GENERAL_KEYWORDS) + r"))\b",
+    re.IGNORECASE
+)
+_NUMBER = re.compile(r"\d{1,3}(?:,\d{3})+|\d{1,5}")
+
+InterfaceMatch = namedtuple("InterfaceMatch", "value kind keyword start end snippet")
+InterfaceDetection = namedtuple("InterfaceDetection", "count kind matches")
+
+
+def find_interface_mentions(text, snippet_chars=SNIPPET_CHARS):
+    """Yield every '<number> <interface keyword>' mention with its position and surrounding context."""
+    for m in _PATTERN.finditer(text):
+        start = m.start()
+        if start and (text[start - 1].isalnum() or text[start - 1] == "_"):
+            continue
+        number = m.group("number").rstrip(",")
+        if not _NUMBER.fullmatch(number):
+            continue
+        kind = "ICOs" if m.group("ico") else "interfaces"
+        snippet = " ".join(text[max(0, m.start() - snippet_chars):m.end() + snippet_chars].split())
+        yield InterfaceMatch(
+            int(number.replace(",", "")), kind,
+            m.group("ico") or m.group("general"), start, m.end(), snippet
+        )
+
+
+def detect_interfaces(text):
+    """
+    Estimate the number of interfaces in an RFP: the largest ICO count if any
+    ICOs are mentioned, else the largest general interface count, else None.
+    The text is not modified.
+    """
+    matches = list(find_interface_mentions(text))
+    for kind in ("ICOs", "interfaces"):
+        values = [m.value for m in matches if m.kind == kind]
+        if values:
+            return InterfaceDetection(max(values), kind, matches)
+    return InterfaceDetection(None, None, matches)
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from Modules.cache_paths import CACHE_DIR, atomic_write
+from Modules.extraction import read_file_bytes
+from Modules.pipeline import STAGES, TEMPLATE_PATH, run_pipeline
+
+
+JOBS_DIR = os.path.join(CACHE_DIR, "jobs")
+JOBS_DB = os.path.join(CACHE_DIR, "jobs.sqlite3")
+# Pipelines run at once for all sessions of this server; each one also generates its sections concurrently.
+JOB_WORKERS = int(os.getenv("RFP_JOB_WORKERS", "2"))
+# Seconds between writes of the extraction page count, so long PDFs do not write once per page.
+PROGRESS_INTERVAL = 0.5
+# Finished jobs (inputs, artefacts and output DOCX) are deleted this many seconds after they finish.
+JOB_TTL = float(os.getenv("RFP_JOB_TTL", str(7 * 24 * 3600)))
+
+Job = namedtuple("Job", "id name status stage timings error created started finished result")
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def _connect(path=JOBS_DB):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        " id TEXT PRIMARY KEY, name TEXT NOT NULL, status TEXT NOT NULL, stage TEXT,"
+        " timings TEXT NOT NULL DEFAULT '{}', error TEXT, regenerate TEXT NOT NULL DEFAULT '[]',"
+        " created REAL NOT NULL, started REAL, finished REAL, result TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS artifacts ("
+        " job_id TEXT NOT NULL, name TEXT NOT NULL, value TEXT NOT NULL, updated REAL NOT NULL,"
+        " PRIMARY KEY (job_id, name))"
+    )
+    return conn
+
+
+@contextmanager
+def _transaction(path=JOBS_DB, immediate=False):
+    """Commit on success; immediate takes the write lock up front, for read-then-write sequences."""
+    conn = _connect(path)
+    try:
+        with conn:
+            if immediate:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+    finally:
+        conn.close()
+
+
+def job_dir(job_id):
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def job_output_path(job_id):
+    """The filled response DOCX of a finished job."""
+    return os.path.join(job_dir(job_id), "response.docx")
+
+
+def job_id_for(rfp_bytes, inventory_bytes=None):
+    """Jobs are keyed by content, so the same upload maps to the same job across reruns and sessions."""
+    digest = hashlib.sha256(rfp_bytes)
+    if inventory_bytes is not None:
+        digest.update(b"\0inventory\0" + inventory_bytes)
+    return digest.hexdigest()[:32]
+
+
+def _get_pool():
+    """Shared worker pool; jobs left queued or running by a previous server process are resumed once."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="rfp-job")
+                with _transaction() as conn:
+                    stale = [row[0] for row in conn.execute(
+                        "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created")]
+                    conn.execute("UPDATE jobs SET status = 'queued', stage = NULL WHERE status IN ('queued', 'running')")
+                for job_id in stale:
+                    print(f"♻️ Resuming job {job_id}")
+                    _pool.submit(_run_job, job_id)
+                prune_jobs()
+    return _pool
+
+
+def _save_input(job_id, file, kind):
+    """Keep a job's input next to it so a worker (or a restarted server) can reopen it."""
+    directory = job_dir(job_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{kind}{os.path.splitext(file.name)[1].lower()}")
+    if not os.path.exists(path):
+        with atomic_write(path) as fh:
+            fh.write(read_file_bytes(file))
+    return path
+
+
+def submit_job(rfp_file, inventory_file=None, regenerate=(), retry=False):
+    """
+    Return the job ID for an upload, queueing the pipeline only when needed: a new
+    upload, a section to regenerate once the job has finished, or retry after a
+    failure. Otherwise the existing job (queued, running or done) is reused.
+    """
+    pool = _get_pool()
+    inventory_bytes = read_file_bytes(inventory_file) if inventory_file is not None else None
+    job_id = job_id_for(read_file_bytes(rfp_file), inventory_bytes)
+    now = time.time()
+    regenerate = sorted(regenerate)
+
+    # Immediate, so two sessions submitting the same upload cannot both see no row and insert it.
+    with _transaction(immediate=True) as conn:
+        row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        queue_job = row is None or (regenerate and row[0] == "done") or (retry and row[0] == "failed")
+        if queue_job:
+            # Also on a rerun: restores inputs a failed job lost.
+            _save_input(job_id, rfp_file, "rfp")
+            if inventory_file is not None:
+                _save_input(job_id, inventory_file, "inventory")
+        if row is None:
+            conn.execute(
+                "INSERT INTO jobs (id, name, status, regenerate, created) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, os.path.basename(rfp_file.name), json.dumps(regenerate), now)
+            )
+        elif queue_job:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', stage = NULL, timings = '{}', error = NULL, regenerate = ?,"
+                " created = ?, started = NULL, finished = NULL WHERE id = ?",
+                (json.dumps(regenerate), now, job_id)
+            )
+        else:
+            return job_id
+    pool.submit(_run_job, job_id)
+    return job_id
+
+
+def get_job(job_id):
+    """Current state of a job, or None if it does not exist."""
+    with _transaction() as conn:
+        row = conn.execute(
+            "SELECT id, name, status, stage, timings, error, created, started, finished, result"
+            " FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+    if row is None:
+        return None
+    return Job(*row[:4], json.loads(row[4]), *row[5:9], json.loads(row[9]) if row[9] else None)
+
+
+def get_artifacts(job_id):
+    """Intermediate results stored by a job so far: name -> JSON value."""
+    with _transaction() as conn:
+        rows = conn.execute("SELECT name, value FROM artifacts WHERE job_id = ?", (job_id,)).fetchall()
+    return {name: json.loads(value) for name, value in rows}
+
+
+def _put_artifact(conn, job_id, name, value):
+    conn.execute(
+        "INSERT OR REPLACE INTO artifacts (job_id, name, value, updated) VALUES (?, ?, ?, ?)",
+        (job_id, name, json.dumps(value, ensure_ascii=False), time.time())
+    )
+
+
+def _stage_artifacts(stage, result):
+    """What each pipeline stage leaves behind for the UI."""
+    if stage == "detect" and result.detection.count:
+        source = next(m for m in result.detection.matches
+                      if m.kind == result.detection.kind and m.value == result.detection.count)
+        return {"detection": {"count": result.detection.count, "kind": result.detection.kind,
+                              "snippet": source.snippet}}
+    if stage == "detect":
+        return {"detection": {"count": None, "kind": None, "snippet": None}}
+    if stage == "inventory" and result.inventory is not None:
+        return {"inventory": {"count": result.inventory.count, "duplicates": result.inventory.duplicates}}
+    if stage == "inventory" and result.inventory_error:
+        return {"inventory_error": result.inventory_error}
+    if stage == "condense":
+        return {"condensed_rfp": result.condensed_rfp}
+    if stage == "retrieve":
+        return {"reference_passages": result.reference_passages}
+    if stage == "generate":
+        return {"sections": result.sections}
+    return {}
+
+
+def _run_job(job_id):
+    """Worker: run the pipeline for a job, recording stage progress, artefacts and the output DOCX."""
+    with _transaction() as conn:
+        row = conn.execute("SELECT regenerate FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return
+        regenerate = set(json.loads(row[0]))
+        conn.execute("UPDATE jobs SET status = 'running', stage = 'extract', started = ? WHERE id = ?",
+                     (time.time(), job_id))
+        conn.execute("DELETE FROM artifacts WHERE job_id = ?", (job_id,))
+
+    timings = {}
+
+    def on_stage(stage, seconds, result):
+        timings[stage] = round(seconds, 3)
+        following = STAGES[STAGES.index(stage) + 1] if stage != STAGES[-1] else None
+        with _transaction() as conn:
+            for name, value in _stage_artifacts(stage, result).items():
+                _put_artifact(conn, job_id, name, value)
+            conn.execute("UPDATE jobs SET stage = ?, timings = ? WHERE id = ?", (following, json.dumps(timings), job_id))
+
+    def on_delta(key, text):
+        with _transaction() as conn:
+            _put_artifact(conn, job_id, f"partial:{key}", text)
+
+    last_progress = 0.0
+
+    def on_progress(done, total):
+        nonlocal last_progress
+        if done < total and time.monotonic() - last_progress < PROGRESS_INTERVAL:
+            return
+        last_progress = time.monotonic()
+        with _transaction() as conn:
+            _put_artifact(conn, job_id, "pages", {"done": done, "total": total})
+
+    generated = {}
+    section_log = []
+
+    def on_section(key, label, section, error):
+        if error is None:
+            generated[key] = section
+        section_log.append({"key": key, "label": label, "error": f"{error}" if error else None})
+        with _transaction() as conn:
+            _put_artifact(conn, job_id, "sections", generated)
+            _put_artifact(conn, job_id, "section_log", section_log)
+
+    directory = job_dir(job_id)
+    try:
+        # Inside the try: a job whose inputs were removed must end as failed, not stay running.
+        inputs = {os.path.splitext(name)[0]: os.path.join(directory, name)
+                  for name in os.listdir(directory) if not name.endswith(".tmp")}
+        if "rfp" not in inputs:
+            raise FileNotFoundError(f"The uploaded RFP of job {job_id} is missing; upload it again.")
+        with open(inputs["rfp"], "rb") as rfp, ExitStack() as stack:
+            inventory = stack.enter_context(open(inputs["inventory"], "rb")) if "inventory" in inputs else None
+            result = run_pipeline(rfp, TEMPLATE_PATH, regenerate=regenerate, on_stage=on_stage,
+                                  on_delta=on_delta, on_progress=on_progress, on_section=on_section,
+                                  inventory_file=inventory)
+        with atomic_write(job_output_path(job_id)) as fh:
+            result.document.save(fh)
+        status, error, metrics = "done", None, result.metrics
+        summary = {"num_interfaces": result.num_interfaces, "detected_type": result.detected_type}
+    except Exception as e:
+        print(f"❌ Job {job_id} failed: {e.__class__.__name__}: {e}")
+        status, error, summary, metrics = "failed", f"{e.__class__.__name__}: {e}", None, None
+
+    with _transaction() as conn:
+        conn.execute("DELETE FROM artifacts WHERE job_id = ? AND name LIKE 'partial:%'", (job_id,))
+        if metrics:
+            _put_artifact(conn, job_id, "metrics", metrics)
+        conn.execute(
+            "UPDATE jobs SET status = ?, stage = NULL, error = ?, finished = ?, result = ? WHERE id = ?",
+            (status, error, time.time(), json.dumps(summary) if summary else None, job_id)
+        )
+    prune_jobs()
+
+
+def delete_job(job_id):
+    """Remove a job, its artefacts and its files."""
+    with _transaction() as conn:
+        conn.execute("DELETE FROM artifacts WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+    shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+def prune_jobs(ttl=JOB_TTL):
+    """Delete finished jobs older than ttl seconds; returns how many were removed."""
+    with _transaction() as conn:
+        expired = [row[0] for row in conn.execute(
+            "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished < ?", (time.time() - ttl,))]
+    for job_id in expired:
+        delete_job(job_id)
+    if expired:
+        print(f"🧹 Removed {len(expired)} expired jobs")
+    return len(expired)
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from Modules.cache_paths import atomic_write
+from Modules.llm_client import MAX_RETRIES, get_http_client
+from Modules.chunking import CHUNK_OVERLAP, CHUNK_TOKENS, chunk_blocks
+from Modules.text_cache import EXTRACTION_VERSION, load_document
+
+
+KNOWLEDGE_FOLDER = "Knowledge_Repo"
+PERSIST_DIR = "chroma_db"
+COLLECTION_NAME = "rfp_responses"
+EMBEDDING_MODEL = "text-embedding-ada-002"
+MANIFEST_FILE = "manifest.json"
+
+# Number of chunks retrieved per query.
+RETRIEVAL_K = int(os.getenv("RFP_RETRIEVAL_K", "6"))
+# Token-level length check of langchain's embeddings client; it downloads tiktoken's BPE file on first use.
+# Chunks stay far below the model's input limit, so offline hosts can turn it off with 0, which sends
+# the texts as they are through the openai client instead.
+EMBEDDING_CHECK_CTX_LENGTH = os.getenv("RFP_EMBEDDING_CHECK_CTX_LENGTH", "1") != "0"
+# Inputs per embeddings request when the length check is off.
+EMBEDDING_BATCH_SIZE = 2048
+
+# Process-wide handles shared by every Streamlit session (and the CLI) on this server.
+_lock = threading.Lock()
+_embedding_model = None
+_knowledge_base = None
+
+
+class _PlainAzureEmbeddings:
+    """Embeddings through the openai client without tokenizing first (RFP_EMBEDDING_CHECK_CTX_LENGTH=0)."""
+
+    def __init__(self, model, **client_args):
+        from openai import AzureOpenAI
+        self.model = model
+        self.client = AzureOpenAI(**client_args)
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            response = self.client.embeddings.create(model=self.model, input=texts[start:start + EMBEDDING_BATCH_SIZE])
+            vectors.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def get_embedding_model():
+    """Return the shared (disk-cached) Azure OpenAI embeddings client, creating it on first use."""
+    global _embedding_model
+    if _embedding_model is None:
+        from Modules.embedding_cache import CachedEmbeddings
+        with _lock:
+            if _embedding_model is None:
+                client_args = dict(
+                    azure_endpoint=os.getenv("AZURE_OPENAI_EMD_ENDPOINT"),
+                    api_key=os.getenv("AZURE_OPENAI_EMD_KEY"),
+                    api_version=os.getenv("AZURE_OPENAI_EMD_VERSION"),
+                    http_client=get_http_client(),
+                    max_retries=MAX_RETRIES
+                )
+                if EMBEDDING_CHECK_CTX_LENGTH:
+                    from langchain_openai import AzureOpenAIEmbeddings
+                    inner = AzureOpenAIEmbeddings(model=EMBEDDING_MODEL, **client_args)
+                else:
+                    inner = _PlainAzureEmbeddings(EMBEDDING_MODEL, **client_args)
+                _embedding_model = CachedEmbeddings(inner, EMBEDDING_MODEL)
+    return _embedding_model
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _load_manifest(persist_dir):
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable manifest: {e}")
+        return None
+
+
+def _save_manifest(persist_dir, manifest):
+    path = os.path.join(persist_dir, MANIFEST_FILE)
+    with atomic_write(path, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+
+
+def _load_documents(path, source, digest):
+    """Extract and chunk one knowledge file into LangChain documents with stable IDs."""
+    with open(path, "rb") as fh:
+        docs = chunk_blocks(load_document(fh).iter_blocks(), source)
+    ids = [f"{source}#{digest[:16]}#{d.metadata['chunk']}" for d in docs]
+    return docs, ids
+
+
+def sync_knowledge_base(db, folder=KNOWLEDGE_FOLDER, persist_dir=PERSIST_DIR):
+    """
+    Bring the collection in line with Knowledge_Repo using a manifest of
+    path, size, mtime and content hash: embed only added or changed files
+    and delete the vectors of removed ones.
+    """
+    chunking = {"tokens": CHUNK_TOKENS, "overlap": CHUNK_OVERLAP, "extraction": EXTRACTION_VERSION}
+    saved = _load_manifest(persist_dir)
+    if saved is None or saved.get("chunking") != chunking:
+        # Vectors with unknown IDs or built with other chunk/extraction settings; start clean.
+        existing = db.get(include=[])["ids"]
+        if existing:
+            print(f"🧹 Clearing {len(existing)} untracked vectors before indexing...")
+            db.delete(ids=existing)
+        saved = {"chunking": chunking, "files": {}}
+    manifest = saved["files"]
+
+    current = {}
+    for f in sorted(os.listdir(folder)):
+        if f.endswith((".pdf", ".docx")):
+            current[f] = os.stat(os.path.join(folder, f))
+
+    stale_ids, new_docs, new_ids = [], [], []
+    added = changed = 0
+    touched = False
+
+    for source in set(manifest) - set(current):
+        stale_ids.extend(manifest.pop(source)["ids"])
+
+    for source, stat in current.items():
+        entry = manifest.get(source)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            continue
+
+        path = os.path.join(folder, source)
+        digest = _file_sha256(path)
+        if entry and entry["sha256"] == digest:
+            entry.update(size=stat.st_size, mtime=stat.st_mtime)
+            touched = True
+            continue
+
+        try:
+            docs, ids = _load_documents(path, source, digest)
+        except Exception as e:
+            print(f"⚠️ Skipped {source}: {e}")
+            continue
+
+        if entry:
+            stale_ids.extend(entry["ids"])
+            changed += 1
+        else:
+            added += 1
+        new_docs.extend(docs)
+        new_ids.extend(ids)
+        manifest[source] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest, "ids": ids}
+
+    if stale_ids:
+        db.delete(ids=stale_ids)
+    if new_docs:
+        db.add_documents(new_docs, ids=new_ids)
+    if stale_ids or new_docs or touched or not os.path.exists(os.path.join(persist_dir, MANIFEST_FILE)):
+        _save_manifest(persist_dir, saved)
+
+    if added or changed or stale_ids:
+        print(f"📘 Knowledge base synced: {added} added, {changed} changed, "
+              f"{len(stale_ids)} stale vectors removed.")
+    if not manifest:
+        raise ValueError(f"No readable files found in {folder}")
+    return db
+
+
+def build_knowledge_base(folder=KNOWLEDGE_FOLDER, persist_dir=PERSIST_DIR, embedding_model=None):
+    """Open the local Chroma vectorstore and incrementally sync it with Knowledge_Repo."""
+    from langchain_chroma import Chroma
+    os.makedirs(folder, exist_ok=True)
+    os.makedirs(persist_dir, exist_ok=True)
+
+    embedding_model = embedding_model or get_embedding_model()
+
+    def open_chroma():
+        return Chroma(
+            embedding_function=embedding_model,
+            persist_directory=persist_dir,
+            collection_name=COLLECTION_NAME
+        )
+
+    try:
+        print("📂 Attempting to load existing DB from", persist_dir)
+        db = open_chroma()
+    except Exception as e:
+        print(f"⚠️ Error loading existing DB: {e}. Rebuilding fresh...")
+        shutil.rmtree(persist_dir, ignore_errors=True)
+        os.makedirs(persist_dir, exist_ok=True)
+        db = open_chroma()
+
+    return sync_knowledge_base(db, folder, persist_dir)
+
+
+def get_knowledge_base():
+    """
+    Return the process-wide Chroma handle, opening it once.
+    The lock makes concurrent first use from several sessions safe.
+    """
+    global _knowledge_base
+    if _knowledge_base is None:
+        embedding_model = get_embedding_model()
+        with _lock:
+            if _knowledge_base is None:
+                _knowledge_base = build_knowledge_base(embedding_model=embedding_model)
+    return _knowledge_base
+
+
+def invalidate_knowledge_base():
+    """Drop the shared handle so the next get_knowledge_base() reopens the store."""
+    global _knowledge_base
+    with _lock:
+        _knowledge_base = None
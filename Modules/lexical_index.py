@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import threading
+import numpy as np
+from Modules.cache_paths import CACHE_DIR, atomic_write
+from Modules.chunking import CHUNK_OVERLAP, CHUNK_TOKENS
+from Modules.knowledge_base import KNOWLEDGE_FOLDER, _file_sha256, _load_documents
+from Modules.text_cache import EXTRACTION_VERSION
+
+
+LEXICAL_DIR = os.path.join(CACHE_DIR, "lexical_index")
+# Okapi BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Keeps SAP-style compounds ("PI/PO", "S/4HANA", "7.5") as one token.
+_TOKEN = re.compile(r"\w+(?:[/.\-]\w+)*")
+
+_lock = threading.Lock()
+_lexical_index = None
+
+
+def analyze(text):
+    """
+    Lower-cased tokens for BM25: compounds are kept and also split into their
+    parts, and a plural 's' is dropped so "ICOs"/"ICO" and "adapters"/"adapter" match.
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        parts = [token] + (re.split(r"[/.\-]", token) if not token.isalnum() else [])
+        for part in parts:
+            if len(part) > 3 and part.endswith("s") and not part.endswith("ss"):
+                part = part[:-1]
+            tokens.append(part)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    BM25 index over the Knowledge_Repo chunks: a sparse document-term matrix
+    holding each term's BM25 weight, so a query is a column sum over its terms.
+    """
+
+    def __init__(self, documents, vocabulary, matrix):
+        self.documents = documents
+        self.vocabulary = vocabulary
+        self.matrix = matrix.tocsc()
+
+    @classmethod
+    def build(cls, documents, k1=BM25_K1, b=BM25_B):
+        from sklearn.feature_extraction.text import CountVectorizer  # scikit-learn takes about a second to import
+        vectorizer = CountVectorizer(analyzer=analyze)
+        counts = vectorizer.fit_transform([d.page_content for d in documents]).tocsr().astype(np.float32)
+        n_docs = counts.shape[0]
+        lengths = np.asarray(counts.sum(axis=1)).ravel()
+        avg_length = lengths.mean() if n_docs else 1.0
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        rows = np.repeat(np.arange(n_docs), np.diff(counts.indptr))
+        tf = counts.data
+        norm = k1 * (1 - b + b * lengths[rows] / avg_length)
+        counts.data = idf[counts.indices] * tf * (k1 + 1) / (tf + norm)
+        vocabulary = {term: int(i) for term, i in vectorizer.vocabulary_.items()}
+        return cls(documents, vocabulary, counts)
+
+    def search(self, query, k):
+        """Top-k (Document, score) pairs for a free-text query; documents sharing no term are left out."""
+        term_ids = sorted({self.vocabulary[t] for t in analyze(query) if t in self.vocabulary})
+        if not term_ids:
+            return []
+        scores = np.asarray(self.matrix[:, term_ids].sum(axis=1)).ravel()
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.documents[i], float(scores[i])) for i in top]
+
+    def save(self, directory, signature):
+        from scipy import sparse
+        os.makedirs(directory, exist_ok=True)
+        docs = [{"text": d.page_content, "metadata": d.metadata} for d in self.documents]
+        for name, write in (
+            ("matrix.npz", lambda fh: sparse.save_npz(fh, self.matrix.tocsr())),
+            ("documents.json", lambda fh: fh.write(json.dumps(docs, ensure_ascii=False).encode("utf-8"))),
+            ("vocabulary.json", lambda fh: fh.write(json.dumps(self.vocabulary).encode("utf-8"))),
+            # Written last: an index whose signature is missing or stale is rebuilt.
+            ("signature.json", lambda fh: fh.write(json.dumps(signature, sort_keys=True).encode("utf-8"))),
+        ):
+            path = os.path.join(directory, name)
+            with atomic_write(path) as fh:
+                write(fh)
+
+    @classmethod
+    def load(cls, directory, signature):
+        """The saved index if it was built from the same files and settings, else None."""
+        from langchain_core.documents import Document
+        from scipy import sparse
+        try:
+            with open(os.path.join(directory, "signature.json"), encoding="utf-8") as fh:
+                if json.load(fh) != json.loads(json.dumps(signature, sort_keys=True)):
+                    return None
+            with open(os.path.join(directory, "documents.json"), encoding="utf-8") as fh:
+                documents = [Document(page_content=d["text"], metadata=d["metadata"]) for d in json.load(fh)]
+            with open(os.path.join(directory, "vocabulary.json"), encoding="utf-8") as fh:
+                vocabulary = json.load(fh)
+            matrix = sparse.load_npz(os.path.join(directory, "matrix.npz"))
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"⚠️ Ignoring unreadable lexical index: {e}")
+            return None
+        return cls(documents, vocabulary, matrix)
+
+
+def _signature(folder):
+    """What the index depends on: chunk/extraction settings, BM25 parameters and each file's content hash."""
+    files = {
+        f: _file_sha256(os.path.join(folder, f))
+        for f in sorted(os.listdir(folder)) if f.endswith((".pdf", ".docx"))
+    }
+    return {"chunking": {"tokens": CHUNK_TOKENS, "overlap": CHUNK_OVERLAP, "extraction": EXTRACTION_VERSION},
+            "bm25": [BM25_K1, BM25_B], "files": files}
+
+
+def build_lexical_index(folder=KNOWLEDGE_FOLDER, directory=LEXICAL_DIR):
+    """
+    Load the persisted BM25 index, or rebuild it when Knowledge_Repo changed.
+    Chunks come from the local extraction cache, so this needs no network.
+    """
+    os.makedirs(folder, exist_ok=True)
+    signature = _signature(folder)
+    index = LexicalIndex.load(directory, signature)
+    if index is not None:
+        return index
+
+    documents = []
+    for source, digest in signature["files"].items():
+        try:
+            docs, ids = _load_documents(os.path.join(folder, source), source, digest)
+        except Exception as e:
+            print(f"⚠️ Skipped {source}: {e}")
+            continue
+        documents.extend(docs)
+    if not documents:
+        raise ValueError(f"No readable files found in {folder}")
+    index = LexicalIndex.build(documents)
+    index.save(directory, signature)
+    print(f"📘 Lexical index built: {len(documents)} chunks, {len(index.vocabulary)} terms.")
+    return index
+
+
+def get_lexical_index():
+    """Return the process-wide lexical index, loading or building it once."""
+    global _lexical_index
+    if _lexical_index is None:
+        with _lock:
+            if _lexical_index is None:
+                _lexical_index = build_lexical_index()
+    return _lexical_index
+
+
+def invalidate_lexical_index():
+    """Drop the shared index so the next get_lexical_index() re-checks Knowledge_Repo."""
+    global _lexical_index
+    with _lock:
+        _lexical_index = None
@@ -0,0 +1,191 @@
+import os
+import random
+import threading
+import time
+from Modules.chunking import count_tokens
+from Modules.metrics import observe_llm
+
+
+# Deployment quotas; 0 disables the corresponding limiter.
+REQUESTS_PER_MINUTE = int(os.getenv("AZURE_OPENAI_FRFP_RPM", "0"))
+TOKENS_PER_MINUTE = int(os.getenv("AZURE_OPENAI_FRFP_TPM", "0"))
+
+MAX_RETRIES = int(os.getenv("RFP_LLM_MAX_RETRIES", "5"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+POOL_CONNECTIONS = int(os.getenv("RFP_HTTP_POOL_SIZE", "20"))
+
+# Ask for usage on streamed completions (stream_options needs API version 2024-09-01 or later);
+# otherwise streamed token counts are estimated.
+STREAM_USAGE = os.getenv("RFP_STREAM_USAGE", "0") == "1"
+
+_lock = threading.Lock()
+_http_client = None
+_chat_client = None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at capacity per minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1.0):
+        if self.capacity <= 0:
+            return
+        # A single request larger than the bucket waits for a full bucket instead of forever.
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.rate
+            time.sleep(wait)
+
+
+request_bucket = TokenBucket(REQUESTS_PER_MINUTE)
+token_bucket = TokenBucket(TOKENS_PER_MINUTE)
+
+
+def get_http_client():
+    """Shared keep-alive HTTP client pooled across every Azure OpenAI call in the process."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        with _lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=POOL_CONNECTIONS, max_keepalive_connections=POOL_CONNECTIONS),
+                    timeout=httpx.Timeout(600.0, connect=10.0),
+                )
+    return _http_client
+
+
+def get_chat_client():
+    """Shared AzureOpenAI chat client; retries are handled by chat_completion()."""
+    global _chat_client
+    if _chat_client is None:
+        from openai import AzureOpenAI
+        http_client = get_http_client()
+        with _lock:
+            if _chat_client is None:
+                _chat_client = AzureOpenAI(
+                    azure_endpoint=os.getenv("AZURE_OPENAI_FRFP_ENDPOINT"),
+                    api_key=os.getenv("AZURE_OPENAI_FRFP_KEY"),
+                    api_version=os.getenv("AZURE_OPENAI_FRFP_VERSION"),
+                    http_client=http_client,
+                    max_retries=0
+                )
+    return _chat_client
+
+
+def _retry_after(error):
+    """Seconds requested by the server's Retry-After (or retry-after-ms) header, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def _is_retryable(error):
+    import openai
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True  # APITimeoutError is a subclass of APIConnectionError
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _record_stream(stream, purpose, started, prompt_tokens, deadline=None):
+    """
+    Pass a streamed completion through, recording its latency and usage once it is
+    consumed. Raises TimeoutError once time.monotonic() passes deadline.
+    """
+    text, usage, status = [], None, "error"
+    try:
+        for chunk in stream:
+            if deadline is not None and time.monotonic() > deadline:
+                status = "timeout"
+                raise TimeoutError(f"Azure OpenAI stream for {purpose} ran past its deadline")
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                text.append(chunk.choices[0].delta.content)
+            yield chunk
+        status = "ok"
+    finally:
+        if status != "ok":
+            stream.close()  # release the connection of an abandoned stream
+        if usage:
+            observe_llm("chat", purpose, time.perf_counter() - started, usage.prompt_tokens, usage.completion_tokens,
+                        status)
+        else:
+            observe_llm("chat", purpose, time.perf_counter() - started, prompt_tokens, count_tokens("".join(text)),
+                        status, estimated=True)
+
+
+def chat_completion(messages, max_tokens, purpose="chat", deadline=None, **kwargs):
+    """
+    chat.completions.create() through the shared client, paced by the RPM/TPM
+    token buckets and retried on 429/5xx/connection errors with exponential
+    backoff and full jitter, honouring Retry-After. Latency and token usage
+    are recorded in Modules.metrics under purpose.
+    With deadline (a time.monotonic() value) the whole call, including retries,
+    backoff and reading a stream, raises TimeoutError once it is passed.
+    """
+    import openai
+    prompt_tokens = sum(count_tokens(m["content"]) for m in messages)
+    estimated_tokens = prompt_tokens + max_tokens
+    client = get_chat_client()
+    if kwargs.get("stream") and STREAM_USAGE:
+        kwargs.setdefault("stream_options", {"include_usage": True})
+
+    timeout = kwargs.get("timeout")
+
+    for attempt in range(MAX_RETRIES + 1):
+        request_bucket.acquire(1)
+        token_bucket.acquire(estimated_tokens)
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Azure OpenAI request for {purpose} ran past its deadline")
+            kwargs["timeout"] = min(timeout, remaining) if timeout else remaining
+        started = time.perf_counter()
+        try:
+            response = client.chat.completions.create(messages=messages, max_tokens=max_tokens, **kwargs)
+        except openai.OpenAIError as e:
+            status = "throttled" if isinstance(e, openai.RateLimitError) else "error"
+            observe_llm("chat", purpose, time.perf_counter() - started, status=status)
+            if attempt == MAX_RETRIES or not _is_retryable(e):
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            print(f"⏳ Azure OpenAI {e.__class__.__name__}; retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        if kwargs.get("stream"):
+            return _record_stream(response, purpose, started, prompt_tokens, deadline)
+        usage = response.usage
+        if usage:
+            observe_llm("chat", purpose, time.perf_counter() - started, usage.prompt_tokens, usage.completion_tokens)
+        else:
+            observe_llm("chat", purpose, time.perf_counter() - started, prompt_tokens, estimated=True)
+        return response
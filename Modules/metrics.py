@@ -0,0 +1,235 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from Modules.cache_paths import CACHE_DIR
+
+
+# Structured event log, one JSON object per line; empty disables it.
+METRICS_LOG = os.getenv("RFP_METRICS_LOG", os.path.join(CACHE_DIR, "metrics.jsonl"))
+METRICS_LOG_MAX_BYTES = int(float(os.getenv("RFP_METRICS_LOG_MAX_MB", "50")) * 1024 * 1024)
+# Port of the Prometheus /metrics endpoint; 0 disables it.
+METRICS_PORT = int(os.getenv("RFP_METRICS_PORT", "0"))
+
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000)
+
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+_server = None
+# Summary of the pipeline run the current code belongs to (see track_run); worker pools copy the context.
+_current_run = contextvars.ContextVar("rfp_run", default=None)
+
+
+class Counter:
+    """Monotonic counter per label set."""
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield self.name, dict(zip(self.labels, key)), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=SECONDS_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with _lock:
+            entry = self.values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        for key, (counts, total, count) in sorted(self.values.items()):
+            labels = dict(zip(self.labels, key))
+            for bound, bucket in zip(self.buckets, counts):
+                yield f"{self.name}_bucket", {**labels, "le": f"{bound:g}"}, bucket
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+STAGE_SECONDS = Histogram("rfp_stage_seconds", "Wall time per pipeline stage.", ("stage",))
+RUNS = Counter("rfp_pipeline_runs_total", "Pipeline runs by outcome.", ("status",))
+LLM_REQUESTS = Counter("rfp_llm_requests_total", "Azure OpenAI requests by purpose and outcome.",
+                       ("operation", "purpose", "status"))
+LLM_SECONDS = Histogram("rfp_llm_request_seconds", "Azure OpenAI request latency, including streaming.",
+                        ("operation", "purpose"))
+LLM_TOKENS = Counter("rfp_llm_tokens_total", "Tokens sent and received, by purpose.", ("operation", "purpose", "kind"))
+CACHE_REQUESTS = Counter("rfp_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+RETRIEVAL_HITS = Histogram("rfp_retrieval_hits", "Passages returned per retrieval, by source.", ("source",),
+                           buckets=COUNT_BUCKETS)
+DOCUMENT_CHARS = Histogram("rfp_document_chars", "Extracted characters per input document.", ("kind",),
+                           buckets=SIZE_BUCKETS)
+REGISTRY = [STAGE_SECONDS, RUNS, LLM_REQUESTS, LLM_SECONDS, LLM_TOKENS, CACHE_REQUESTS, RETRIEVAL_HITS, DOCUMENT_CHARS]
+
+
+def log_event(event, **fields):
+    """Append one event to the JSON log, tagged with the current run."""
+    if not METRICS_LOG:
+        return
+    run = _current_run.get()
+    record = {"ts": round(time.time(), 3), "event": event}
+    if run is not None:
+        record.update(run_id=run["run_id"], name=run["name"])
+    record.update(fields)
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with _log_lock:
+        try:
+            os.makedirs(os.path.dirname(METRICS_LOG) or ".", exist_ok=True)
+            if os.path.exists(METRICS_LOG) and os.path.getsize(METRICS_LOG) > METRICS_LOG_MAX_BYTES:
+                os.replace(METRICS_LOG, METRICS_LOG + ".1")
+            with open(METRICS_LOG, "a", encoding="utf-8") as fh:
+                fh.write(line)
+        except OSError as e:
+            print(f"⚠️ Could not write metrics log: {e}")
+
+
+def _run_summary(section, key, **amounts):
+    run = _current_run.get()
+    if run is None:
+        return
+    with _lock:
+        entry = run[section].setdefault(key, {})
+        for name, amount in amounts.items():
+            entry[name] = round(entry.get(name, 0) + amount, 4)
+
+
+@contextmanager
+def track_run(name):
+    """
+    Collect the metrics of one pipeline run into a summary dict (yielded), and log
+    it when the run ends. Code running in worker threads is attributed to the run
+    when the pool task is started with contextvars.copy_context().run.
+    """
+    run = {"run_id": uuid.uuid4().hex[:12], "name": name, "stages": {}, "llm": {}, "cache": {},
+           "retrieval": {}, "documents": {}}
+    token = _current_run.set(run)
+    started = time.perf_counter()
+    status = "failed"
+    try:
+        yield run
+        status = "ok"
+    finally:
+        run["status"] = status
+        run["seconds"] = round(time.perf_counter() - started, 4)
+        RUNS.inc(status=status)
+        log_event("run", status=status, seconds=run["seconds"], stages=run["stages"], llm=run["llm"],
+                  cache=run["cache"], retrieval=run["retrieval"], documents=run["documents"])
+        _current_run.reset(token)
+
+
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    _run_summary("stages", stage, seconds=seconds)
+    log_event("stage", stage=stage, seconds=round(seconds, 4))
+
+
+def observe_llm(operation, purpose, seconds, prompt_tokens=0, completion_tokens=0, status="ok", estimated=False):
+    """One chat or embeddings request: latency, tokens (from response.usage unless estimated) and outcome."""
+    LLM_REQUESTS.inc(operation=operation, purpose=purpose, status=status)
+    LLM_SECONDS.observe(seconds, operation=operation, purpose=purpose)
+    LLM_TOKENS.inc(prompt_tokens, operation=operation, purpose=purpose, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, operation=operation, purpose=purpose, kind="completion")
+    _run_summary("llm", purpose, calls=1, seconds=seconds, prompt_tokens=prompt_tokens,
+                 completion_tokens=completion_tokens)
+    log_event("llm", operation=operation, purpose=purpose, status=status, seconds=round(seconds, 4),
+              prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, estimated=estimated)
+
+
+def observe_cache(cache, hits=0, misses=0):
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, result="miss")
+    _run_summary("cache", cache, hit=hits, miss=misses)
+    log_event("cache", cache=cache, hits=hits, misses=misses)
+
+
+def observe_retrieval(source, hits):
+    RETRIEVAL_HITS.observe(hits, source=source)
+    _run_summary("retrieval", source, hits=hits)
+    log_event("retrieval", source=source, hits=hits)
+
+
+def observe_document(kind, chars, **sizes):
+    """Size of an input document: extracted characters plus e.g. bytes, pages or rows."""
+    DOCUMENT_CHARS.observe(chars, kind=kind)
+    _run_summary("documents", kind, chars=chars, **sizes)
+    log_event("document", kind=kind, chars=chars, **sizes)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for metric in REGISTRY:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{_label_text(labels)} {value:g}" for name, labels, value in metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    """Serve /metrics on a daemon thread, once per process; does nothing when port is 0."""
+    global _server
+    if not port or _server is not None:
+        return _server
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"⚠️ Metrics endpoint not started on port {port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="rfp-metrics", daemon=True).start()
+            print(f"📈 Prometheus metrics on http://{host}:{port}/metrics")
+    return _server
@@ -0,0 +1,274 @@
+import argparse
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from Modules.cache_paths import atomic_write
+from Modules.condense import get_condensed_rfp
+from Modules.docx_template import get_compiled_template, insert_executive_summary_into_template
+from Modules.extraction import file_size, read_file_bytes
+from Modules.generation import generate_sections
+from Modules.ico_inventory import INVENTORY_EXTENSIONS, append_ico_appendix, read_inventory
+from Modules.interface_detection import detect_interfaces
+from Modules.knowledge_base import get_embedding_model
+from Modules.llm_client import get_chat_client
+from Modules.metrics import observe_document, observe_stage, start_metrics_server, track_run
+from Modules.retrieval import open_indexes, retrieve
+from Modules.text_cache import load_document
+
+
+TEMPLATE_PATH = "Template/PIPO TO IS Response Template.docx"
+MIN_RFP_CHARS = 100
+RFP_EXTENSIONS = (".pdf", ".docx")
+STAGES = ["extract", "detect", "inventory", "condense", "retrieve", "generate", "render"]
+
+# RFPs processed at once by the batch CLI; each one also generates its sections concurrently.
+BATCH_WORKERS = int(os.getenv("RFP_BATCH_WORKERS", "2"))
+REPORT_FILE = "report.csv"
+REPORT_FIELDS = ["file", "status", "output", "interfaces"] + [f"{s}_s" for s in STAGES] + ["total_s", "error"]
+
+# Preload clients, the template and the knowledge base when a server process starts (see start_warm_up).
+WARM_UP = os.getenv("RFP_WARM_UP", "0") == "1"
+
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+
+
+class PipelineError(Exception):
+    """An RFP could not be turned into a proposal (unreadable file or failed sections)."""
+
+
+@dataclass
+class PipelineResult:
+    """Everything one pipeline run produced, plus wall-clock seconds per stage and the run's metrics summary."""
+    name: str
+    num_interfaces: int = None
+    detected_type: str = None
+    detection: object = None
+    inventory: object = None
+    inventory_error: str = None
+    condensed_rfp: str = None
+    reference_passages: list = field(default_factory=list)
+    sections: dict = field(default_factory=dict)
+    document: object = None
+    timings: dict = field(default_factory=dict)
+    metrics: dict = field(default_factory=dict)
+
+
+def output_file_name(name):
+    return f"RFP_Response_{os.path.splitext(os.path.basename(name))[0]}.docx"
+
+
+def run_pipeline(file, template_path=TEMPLATE_PATH, regenerate=(), on_stage=None, inventory_file=None,
+                 on_delta=None, on_progress=None, on_section=None):
+    """
+    Extract, detect interfaces, condense, retrieve, generate and fill the template
+    for one RFP (an UploadedFile or open binary file with a .name).
+    With an ICO inventory (CSV/XLSX) its row count replaces the detected interface
+    count and the rows are appended as the ICO appendix; an unreadable inventory is
+    reported in result.inventory_error and the run continues with the detected count.
+    on_stage(stage, seconds, result) is called after each stage with the result so
+    far; on_progress(pages_done, total_pages) reports PDF extraction,
+    on_section(key, label, section, error) reports each section as it finishes and
+    on_delta(section_key, text_so_far) streams section text. Stage timings,
+    token usage, cache and retrieval counts are recorded in Modules.metrics and
+    summarised in result.metrics. Raises PipelineError.
+    """
+    result = PipelineResult(os.path.basename(file.name))
+    with track_run(result.name) as run:
+        result.metrics = run
+        clock = time.perf_counter()
+
+        def finish(stage):
+            nonlocal clock
+            now = time.perf_counter()
+            result.timings[stage] = now - clock
+            clock = now
+            observe_stage(stage, result.timings[stage])
+            if on_stage:
+                on_stage(stage, result.timings[stage], result)
+
+        document = load_document(file, on_progress)
+        rfp_text = document.text
+        observe_document("rfp", len(rfp_text), bytes=file_size(file), pages=len(document.pages))
+        if len(rfp_text.strip()) < MIN_RFP_CHARS:
+            raise PipelineError("Could not extract enough text from the document.")
+        finish("extract")
+
+        result.detection = detect_interfaces(rfp_text)
+        result.num_interfaces, result.detected_type = result.detection.count, result.detection.kind
+        finish("detect")
+
+        if inventory_file is not None:
+            try:
+                result.inventory = read_inventory(inventory_file)
+            except (ValueError, RuntimeError) as e:
+                result.inventory_error = str(e)
+                print(f"⚠️ Could not read the ICO inventory, continuing without the appendix: {e}")
+        if result.inventory is not None:
+            observe_document("inventory", sum(len(v) for row in result.inventory.rows for v in row),
+                             bytes=file_size(inventory_file), rows=result.inventory.rows_read,
+                             icos=result.inventory.count)
+            result.num_interfaces, result.detected_type = result.inventory.count, "ICOs"
+        finish("inventory")
+
+        result.condensed_rfp = get_condensed_rfp(rfp_text, read_file_bytes(file))
+        finish("condense")
+
+        ref_docs = retrieve(rfp_text)
+        result.reference_passages = [d.page_content for d in ref_docs]
+        finish("retrieve")
+
+        failed = []
+        for key, label, section, error in generate_sections(
+            result.reference_passages, result.condensed_rfp, result.num_interfaces,
+            regenerate=regenerate, on_delta=on_delta
+        ):
+            if error:
+                failed.append(f"{label}: {error}")
+            else:
+                result.sections[key] = section
+            if on_section:
+                on_section(key, label, section, error)
+        if failed:
+            raise PipelineError("; ".join(failed))
+        finish("generate")
+
+        exec_summary, objective = result.sections["exec_summary"]
+        result.document = insert_executive_summary_into_template(
+            template_path,
+            summary_text=exec_summary,
+            objective_text=objective,
+            scope_text=result.sections["scope"],
+            resource_schedule_text=result.sections["resource_schedule"],
+            communication_plan_text=result.sections["communication_plan"]
+        )
+        if result.inventory is not None:
+            append_ico_appendix(result.document, result.inventory)
+        finish("render")
+        return result
+
+
+def warm_up(template_path=TEMPLATE_PATH):
+    """
+    Pay the first request's one-off costs up front: create the Azure OpenAI clients
+    (importing openai and langchain, and opening the HTTP pool), compile the
+    response template and open and sync the retrieval indexes. A failing step is
+    reported and skipped; the first request then retries it.
+    """
+    started = time.perf_counter()
+    steps = [
+        ("Azure OpenAI clients", lambda: (get_chat_client(), get_embedding_model())),
+        ("response template", lambda: get_compiled_template(template_path)),
+        ("retrieval indexes", open_indexes),
+    ]
+    for label, step in steps:
+        try:
+            step()
+        except Exception as e:
+            print(f"⚠️ Warm-up of {label} failed: {e.__class__.__name__}: {e}")
+    print(f"🔥 Warm-up finished in {time.perf_counter() - started:.1f}s")
+
+
+def start_warm_up(template_path=TEMPLATE_PATH):
+    """Run warm_up() once per process on a background thread, so server startup is not blocked."""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, args=(template_path,), name="rfp-warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def find_inventory(rfp_path):
+    """The ICO inventory next to an RFP, sharing its name (Acme.pdf -> Acme.xlsx or Acme.csv), if any."""
+    stem = os.path.splitext(rfp_path)[0]
+    return next((stem + ext for ext in INVENTORY_EXTENSIONS if os.path.exists(stem + ext)), None)
+
+
+def process_file(path, output_dir, template_path=TEMPLATE_PATH):
+    """Run the pipeline on one RFP file (and its inventory, if any) and save the filled DOCX; returns a report row."""
+    row = {"file": os.path.basename(path), "status": "ok", "output": output_file_name(path)}
+    output_path = os.path.join(output_dir, row["output"])
+    started = time.perf_counter()
+    try:
+        inventory_path = find_inventory(path)
+        with open(path, "rb") as fh, ExitStack() as stack:
+            inventory_file = stack.enter_context(open(inventory_path, "rb")) if inventory_path else None
+            result = run_pipeline(fh, template_path, inventory_file=inventory_file)
+        # Write under a temporary name so an interrupted save is never mistaken for a finished file.
+        with atomic_write(output_path) as fh:
+            result.document.save(fh)
+        row["interfaces"] = result.num_interfaces
+        row.update({f"{stage}_s": f"{seconds:.2f}" for stage, seconds in result.timings.items()})
+    except Exception as e:
+        row.update(status="failed", output="", error=f"{e.__class__.__name__}: {e}")
+    row["total_s"] = f"{time.perf_counter() - started:.2f}"
+    return row
+
+
+def _append_report(report_path, row):
+    new = not os.path.exists(report_path)
+    with open(report_path, "a", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=REPORT_FIELDS)
+        if new:
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def run_batch(input_dir, output_dir, max_workers=BATCH_WORKERS, template_path=TEMPLATE_PATH, force=False):
+    """
+    Process every PDF/DOCX in input_dir, max_workers at a time, writing the filled
+    DOCX files and a per-file timing report (report.csv, appended as files finish)
+    to output_dir. A CSV/XLSX next to an RFP with the same name is used as its
+    ICO inventory. RFPs whose output already exists are skipped unless force is set,
+    so a rerun after a crash or failure only processes what is left.
+    Returns the report rows of this run.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    report_path = os.path.join(output_dir, REPORT_FILE)
+    paths = sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.endswith(RFP_EXTENSIONS) and not name.startswith("~$")
+    )
+    pending = [p for p in paths if force or not os.path.exists(os.path.join(output_dir, output_file_name(p)))]
+    print(f"📂 {len(paths)} RFPs found, {len(paths) - len(pending)} already done, {len(pending)} to process")
+    if not pending:
+        return []
+
+    warm_up(template_path)  # open clients, template and indexes once before the workers share them
+    rows = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(process_file, path, output_dir, template_path) for path in pending]
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = future.result()
+                rows.append(row)
+                _append_report(report_path, row)
+                icon = "✅" if row["status"] == "ok" else "❌"
+                detail = row.get("error") or row["output"]
+                print(f"{icon} [{done}/{len(pending)}] {row['file']} ({row['total_s']}s) {detail}")
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            raise
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate proposal responses for a folder of RFPs.")
+    parser.add_argument("input_dir", help="folder containing RFP PDF/DOCX files")
+    parser.add_argument("output_dir", help="folder for the filled DOCX files and report.csv")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="RFPs processed concurrently")
+    parser.add_argument("--template", default=TEMPLATE_PATH, help="response template DOCX")
+    parser.add_argument("--force", action="store_true", help="reprocess RFPs whose output already exists")
+    args = parser.parse_args(argv)
+
+    start_metrics_server()
+    rows = run_batch(args.input_dir, args.output_dir, args.workers, args.template, args.force)
+    failed = [r["file"] for r in rows if r["status"] != "ok"]
+    print(f"🏁 {len(rows) - len(failed)} succeeded, {len(failed)} failed; report: {os.path.join(args.output_dir, REPORT_FILE)}")
+    return 1 if failed else 0
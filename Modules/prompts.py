@@ -163,3 +163,82 @@ Condensed RFP:
 {condensed_rfp}
 """
 
+
+
+def get_combined_sections_prompt(reference_text, condensed_rfp, num_interfaces=None):
+    """
+    All proposal sections in one request, answered as one JSON object. The
+    per-section prompts are embedded as the instructions, so both generation
+    modes ask for the same content; the reference text and RFP are sent once.
+    """
+    shared = ("(the shared reference text at the end of this prompt)", "(the condensed RFP at the end of this prompt)")
+    instructions = "\n\n".join(
+        f"### SECTION {i}\n{prompt.strip()}" for i, prompt in enumerate([
+            get_executive_summary_and_objective_prompt(*shared, num_interfaces),
+            get_scope_prereq_assumptions_prompt(*shared, num_interfaces),
+            get_resource_schedule_and_commercial_prompt(*shared),
+            get_communication_plan_prompt(*shared),
+        ], start=1)
+    )
+
+    return f"""
+You are writing four sections of one SAP proposal for **Crave InfoTech** in a single answer.
+Follow the instructions of each section below exactly, as if it were its own request.
+
+{instructions}
+
+---
+
+### 🔹 OUTPUT FORMAT:
+Return ONE JSON object with exactly these string fields, each holding the Markdown of one part
+without its section title:
+- "exec_summary": the Executive Summary (section 1)
+- "objective": the Objective, including its table and the Appendix line (section 1)
+- "scope": In Scope, Prerequisites, Assumptions and Out of Scope (section 2)
+- "resource_schedule": Resource Schedule and Commercials (section 3)
+- "communication_plan": the Communication Plan (section 4)
+
+### 🔹 SHARED REFERENCE TEXT (style, tone and content reference for every section):
+{reference_text}
+
+### 🔹 CONDENSED RFP CONTENT:
+{condensed_rfp}
+"""
+
+
+def get_rfp_chunk_summary_prompt(rfp_chunk):
+    """
+    Map step of RFP condensation: extract the proposal-relevant facts from one RFP chunk.
+    """
+    return f"""
+You are an SAP presales analyst preparing an RFP brief for a proposal team.
+
+Summarise the RFP excerpt below as terse bullet points. Keep ONLY facts that matter for writing the proposal:
+- Client name, industry and business context
+- Scope of work, deliverables and exclusions
+- Interface / ICO / IFlow counts, adapters and systems involved (keep every number exactly as written)
+- Current and target landscape (e.g. SAP PI/PO version, Integration Suite, BTP, S/4HANA)
+- Timelines, phases, milestones and go-live dates
+- Commercial, staffing, governance and communication requirements
+
+Do not add anything that is not in the excerpt. If the excerpt has nothing relevant, reply with "None".
+
+RFP Excerpt:
+{rfp_chunk}
+"""
+
+
+def get_rfp_digest_prompt(chunk_summaries, max_words):
+    """
+    Reduce step of RFP condensation: merge chunk summaries into one bounded digest.
+    """
+    return f"""
+You are an SAP presales analyst preparing an RFP brief for a proposal team.
+
+Merge the partial summaries below into ONE condensed RFP digest of at most {max_words} words.
+Use these markdown headings: Client & Context, Scope, Interfaces & Landscape, Timeline, Commercial & Governance.
+Remove duplicates, keep every number, name and date exactly as written, and do not invent details.
+
+Partial Summaries:
+{chunk_summaries}
+"""
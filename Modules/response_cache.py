@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from Modules.cache_paths import CACHE_DIR
+
+
+CACHE_PATH = os.path.join(CACHE_DIR, "responses.sqlite3")
+CACHE_ENABLED = os.getenv("RFP_RESPONSE_CACHE", "1") != "0"
+CACHE_TTL = float(os.getenv("RFP_RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_BYTES = int(float(os.getenv("RFP_RESPONSE_CACHE_MAX_MB", "200")) * 1024 * 1024)
+
+
+def cache_key(prompt, model, temperature, max_tokens):
+    """SHA-256 over everything that determines a completion."""
+    payload = json.dumps([prompt, model, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _connect(path=CACHE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS responses ("
+        " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+        " created REAL NOT NULL, accessed REAL NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+    return conn
+
+
+@contextmanager
+def _transaction(path):
+    conn = _connect(path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def get(key, path=CACHE_PATH, ttl=CACHE_TTL):
+    """Return the cached completion for key, or None if missing or older than ttl."""
+    if not CACHE_ENABLED:
+        return None
+    now = time.time()
+    with _transaction(path) as conn:
+        row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > ttl:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+    return row[0]
+
+
+def put(key, value, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+    """Store a completion, then evict least-recently-used entries beyond max_bytes."""
+    if not CACHE_ENABLED:
+        return
+    now = time.time()
+    size = len(value.encode("utf-8"))
+    with _transaction(path) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, value, size, now, now)
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > max_bytes:
+            evicted = 0
+            for old_key, old_size in conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                if total <= max_bytes or old_key == key:
+                    break
+                conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                total -= old_size
+                evicted += 1
+            print(f"🧹 Response cache: evicted {evicted} least-recently-used entries.")
@@ -0,0 +1,157 @@
+import os
+import re
+from Modules.knowledge_base import RETRIEVAL_K, get_knowledge_base
+from Modules.lexical_index import get_lexical_index
+from Modules.metrics import log_event, observe_retrieval
+
+
+# Topics worth a query of their own; keywords are matched case-insensitively.
+QUERY_TOPICS = {
+    "scope": ["scope", "objective", "migration", "deliverables?", "requirements?"],
+    "interfaces": ["ICOs?", "interfaces?", "integration configuration objects?", "IFlows?", "adapters?", "mappings?"],
+    "landscape": ["landscape", "PI/PO", "PO 7\\.\\d", "Integration Suite", "BTP", "S/4 ?HANA", "ECC", "systems?"],
+    "timeline": ["timelines?", "schedule", "weeks?", "months?", "milestones?", "go-live", "phases?"],
+}
+QUERY_CHARS = int(os.getenv("RFP_QUERY_CHARS", "1200"))
+PASSAGES_PER_QUERY = 3
+RRF_K = 60
+
+# "lexical" (BM25 only, no API calls), "vector" (embeddings only) or "hybrid" (both, score-fused).
+RETRIEVAL_MODES = ("lexical", "vector", "hybrid")
+RETRIEVAL_MODE = os.getenv("RFP_RETRIEVAL_MODE", "hybrid")
+# Weight of the vector score in hybrid mode; the BM25 score gets the rest.
+HYBRID_ALPHA = float(os.getenv("RFP_HYBRID_ALPHA", "0.5"))
+
+_TOPIC_PATTERNS = {
+    topic: re.compile(r"\b(?:" + "|".join(words) + r")\b", re.IGNORECASE)
+    for topic, words in QUERY_TOPICS.items()
+}
+_PASSAGE_SPLIT = re.compile(r"\n\s*\n|(?<=[.!?])\s+(?=[A-Z])")
+
+
+def build_queries(rfp_text, max_chars=QUERY_CHARS):
+    """
+    Condense the RFP into a handful of short retrieval queries: the document
+    opening plus the passages densest in each topic's keywords.
+    """
+    passages = list(dict.fromkeys(p.strip() for p in _PASSAGE_SPLIT.split(rfp_text) if len(p.strip()) > 40))
+    queries = []
+
+    opening = rfp_text.strip()[:max_chars]
+    if opening:
+        queries.append(opening)
+
+    for topic, pattern in _TOPIC_PATTERNS.items():
+        scored = [(len(pattern.findall(p)), i) for i, p in enumerate(passages)]
+        best = sorted((s for s in scored if s[0]), reverse=True)[:PASSAGES_PER_QUERY]
+        if not best:
+            continue
+        # Keep document order so the query reads naturally.
+        query = " ".join(passages[i] for _, i in sorted(best, key=lambda s: s[1]))
+        queries.append(query[:max_chars])
+
+    return queries
+
+
+def _doc_key(doc):
+    meta = doc.metadata
+    return (meta.get("source"), meta.get("chunk"), doc.page_content if "chunk" not in meta else None)
+
+
+def reciprocal_rank_fusion(result_lists, k=RETRIEVAL_K, rrf_k=RRF_K):
+    """Merge ranked document lists; each list contributes 1 / (rrf_k + rank)."""
+    scores, docs = {}, {}
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ranked[:k]]
+
+
+def _normalize(scored):
+    """Min-max scale (doc, score) pairs to 0..1 by doc key; a single or tied score maps to 1."""
+    if not scored:
+        return {}
+    low, high = min(s for _, s in scored), max(s for _, s in scored)
+    span = high - low
+    return {_doc_key(d): (s - low) / span if span else 1.0 for d, s in scored}
+
+
+def fuse_scores(lexical, vector, k=RETRIEVAL_K, alpha=HYBRID_ALPHA):
+    """
+    Rank the union of one query's BM25 and vector hits by
+    alpha * vector + (1 - alpha) * lexical, each min-max normalised; a document
+    missing from one list scores 0 there.
+    """
+    lex, vec = _normalize(lexical), _normalize(vector)
+    docs = {_doc_key(d): d for d, _ in lexical + vector}
+    fused = {key: alpha * vec.get(key, 0.0) + (1 - alpha) * lex.get(key, 0.0) for key in docs}
+    return [docs[key] for key in sorted(fused, key=fused.get, reverse=True)[:k]]
+
+
+def retrieve_reference_docs(db, rfp_text, k=RETRIEVAL_K, lexical_index=None, alpha=HYBRID_ALPHA):
+    """
+    Retrieve reference passages for an RFP with several short queries, merged
+    with reciprocal-rank fusion. Each query searches the Chroma store db (all
+    queries embedded in one batched request) and/or the BM25 lexical_index;
+    with both, the two scores are fused per query. Either handle may be None.
+    """
+    queries = build_queries(rfp_text)
+    if not queries:
+        return []
+    lexical = [lexical_index.search(q, k) if lexical_index is not None else [] for q in queries]
+    if lexical_index is not None:
+        observe_retrieval("lexical", sum(map(len, lexical)))
+    if db is None:
+        fused = reciprocal_rank_fusion([[d for d, _ in hits] for hits in lexical], k=k)
+    else:
+        vectors = db.embeddings.embed_documents(queries)
+        # Chroma returns distances (lower is closer); negate them so higher is better like BM25.
+        vector = [[(d, -distance) for d, distance in db.similarity_search_by_vector_with_relevance_scores(v, k=k)]
+                  for v in vectors]
+        observe_retrieval("vector", sum(map(len, vector)))
+        if lexical_index is None:
+            fused = reciprocal_rank_fusion([[d for d, _ in hits] for hits in vector], k=k)
+        else:
+            fused = reciprocal_rank_fusion([fuse_scores(l, v, k, alpha) for l, v in zip(lexical, vector)], k=k)
+    observe_retrieval("fused", len(fused))
+    return fused
+
+
+def open_indexes(mode=RETRIEVAL_MODE):
+    """
+    The shared (Chroma store, lexical index) pair a mode needs, None for the other.
+    Hybrid mode goes on without the store if it cannot be opened.
+    """
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode {mode!r}; expected one of {', '.join(RETRIEVAL_MODES)}")
+    lexical_index = get_lexical_index() if mode != "vector" else None
+    if mode == "lexical":
+        return None, lexical_index
+    try:
+        return get_knowledge_base(), lexical_index
+    except Exception as e:
+        if mode == "vector":
+            raise
+        print(f"⚠️ Vector store unavailable ({e.__class__.__name__}: {e}); using lexical retrieval only.")
+        log_event("retrieval_fallback", reason=f"{e.__class__.__name__}: {e}")
+        return None, lexical_index
+
+
+def retrieve(rfp_text, k=RETRIEVAL_K, mode=RETRIEVAL_MODE):
+    """
+    Retrieve reference passages in the given mode using the shared knowledge
+    base handles. Hybrid mode degrades to lexical-only when the vector store or
+    the embeddings endpoint fails (e.g. throttled), so generation can go on.
+    """
+    db, lexical_index = open_indexes(mode)
+    try:
+        return retrieve_reference_docs(db, rfp_text, k, lexical_index)
+    except Exception as e:
+        if db is None or lexical_index is None:
+            raise
+        print(f"⚠️ Vector retrieval failed ({e.__class__.__name__}: {e}); using lexical retrieval only.")
+        log_event("retrieval_fallback", reason=f"{e.__class__.__name__}: {e}")
+        return retrieve_reference_docs(None, rfp_text, k, lexical_index)
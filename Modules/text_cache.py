@@ -0,0 +1,71 @@
+import gzip
+import hashlib
+import json
+import os
+from Modules.cache_paths import CACHE_DIR, atomic_write
+from Modules.extraction import ExtractedDocument, read_file_bytes, extract_document
+from Modules.metrics import observe_cache
+
+
+TEXT_CACHE_DIR = os.path.join(CACHE_DIR, "extracted")
+TEXT_CACHE_MAX_BYTES = int(float(os.getenv("RFP_TEXT_CACHE_MAX_MB", "500")) * 1024 * 1024)
+# Bump when extraction output changes so stale entries are not reused.
+EXTRACTION_VERSION = 2
+
+
+def _cache_path(digest, cache_dir):
+    return os.path.join(cache_dir, f"{digest}-v{EXTRACTION_VERSION}.json.gz")
+
+
+def _evict(cache_dir, max_bytes, keep):
+    """Delete least-recently-used entries (oldest mtime; hits touch it) until under max_bytes."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".json.gz"):
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
+
+
+def load_document(file, on_progress=None, cache_dir=TEXT_CACHE_DIR, max_bytes=TEXT_CACHE_MAX_BYTES):
+    """
+    Return the ExtractedDocument for a PDF/DOCX, keyed by the SHA-256 of its bytes.
+    Entries are gzip-compressed JSON with the text and its page/block spans.
+    """
+    data = read_file_bytes(file)
+    digest = hashlib.sha256(data).hexdigest()
+    path = _cache_path(digest, cache_dir)
+
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            cached = json.load(fh)
+        os.utime(path)
+        observe_cache("text", hits=1)
+        return ExtractedDocument(cached["text"], cached["pages"], cached["blocks"])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Ignoring unreadable text cache entry {path}: {e}")
+    observe_cache("text", misses=1)
+
+    document = extract_document(file, on_progress)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with atomic_write(path) as raw, gzip.open(raw, "wt", encoding="utf-8", compresslevel=6) as fh:
+        json.dump({"text": document.text, "pages": document.pages, "blocks": document.blocks}, fh)
+    _evict(cache_dir, max_bytes, keep=path)
+    return document
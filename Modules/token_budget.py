@@ -0,0 +1,64 @@
+import os
+from Modules.chunking import count_tokens, get_encoding
+
+
+# Context window of the chat deployment, and the slack kept for message framing.
+CONTEXT_TOKENS = int(os.getenv("AZURE_OPENAI_FRFP_CONTEXT_TOKENS", "16384"))
+SAFETY_MARGIN = 200
+# Share of the free prompt space reserved for the RFP before reference passages are packed.
+RFP_SHARE = float(os.getenv("RFP_PROMPT_RFP_SHARE", "0.5"))
+
+
+def section_budget(section, max_tokens):
+    """Prompt budget for a section: RFP_PROMPT_BUDGET_<SECTION> if set, else what the context leaves after max_tokens."""
+    override = os.getenv(f"RFP_PROMPT_BUDGET_{section.upper()}")
+    if override:
+        return int(override)
+    return CONTEXT_TOKENS - max_tokens - SAFETY_MARGIN
+
+
+def truncate_tokens(text, max_tokens):
+    enc = get_encoding()
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max(0, max_tokens)])
+
+
+def assemble_prompt(builder, section, reference_passages, condensed_rfp, max_tokens, *builder_args):
+    """
+    Build a section prompt that fits its token budget.
+    The RFP gets up to RFP_SHARE of the free space; reference passages are then
+    packed in relevance order and lower-ranked ones dropped; any space left over
+    goes back to the RFP. Logs the token breakdown of the final prompt.
+    """
+    if isinstance(reference_passages, str):
+        reference_passages = [reference_passages]
+
+    budget = section_budget(section, max_tokens)
+    template_tokens = count_tokens(builder("", "", *builder_args))
+    available = max(0, budget - template_tokens)
+
+    rfp_tokens = count_tokens(condensed_rfp)
+    rfp_allowance = min(rfp_tokens, int(available * RFP_SHARE))
+
+    kept, reference_tokens = [], 0
+    separator_tokens = count_tokens("\n\n")
+    for passage in reference_passages:
+        cost = count_tokens(passage) + separator_tokens
+        if reference_tokens + cost > available - rfp_allowance:
+            continue
+        kept.append(passage)
+        reference_tokens += cost
+
+    rfp_allowance = min(rfp_tokens, available - reference_tokens)
+    rfp = truncate_tokens(condensed_rfp, rfp_allowance)
+    reference_text = "\n\n".join(kept)
+    prompt = builder(reference_text, rfp, *builder_args)
+
+    print(
+        f"🧮 {section}: template={template_tokens} reference={reference_tokens} "
+        f"({len(kept)}/{len(reference_passages)} passages) rfp={min(rfp_tokens, rfp_allowance)}/{rfp_tokens} "
+        f"prompt={count_tokens(prompt)}/{budget} completion<={max_tokens}"
+    )
+    return prompt
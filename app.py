@@ -1,38 +1,22 @@
-import streamlit as st
 import os
-import time
-import re
-from io import BytesIO
+import streamlit as st
 from dotenv import load_dotenv
-from PyPDF2 import PdfReader
-import docx
-from docx import Document
-from openai import AzureOpenAI
-from langchain_openai import AzureOpenAIEmbeddings
-from langchain_chroma import Chroma
-from langchain_core.documents import Document as LDocument
-from docx.shared import Inches, RGBColor
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
-from docx.shared import Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.table import WD_ALIGN_VERTICAL
-# Assuming Modules/prompts exists and is correctly imported
-from Modules.prompts import (
-    get_executive_summary_and_objective_prompt,
-    get_scope_prereq_assumptions_prompt,
-    get_resource_schedule_and_commercial_prompt,
-    get_communication_plan_prompt
-)
+load_dotenv()  # before Modules imports: they read their settings from the environment
+from Modules.generation import GENERATION_MODE, SECTIONS
+from Modules.jobs import delete_job, get_artifacts, get_job, job_output_path, submit_job
+from Modules.knowledge_base import invalidate_knowledge_base
+from Modules.lexical_index import invalidate_lexical_index
+from Modules.metrics import start_metrics_server
+from Modules.pipeline import STAGES, WARM_UP, output_file_name, start_warm_up
+
+start_metrics_server()  # Prometheus /metrics when RFP_METRICS_PORT is set; once per server process
+if WARM_UP:
+    start_warm_up()
 
 
 # -------------------------------------------------------
 # 1. SETUP
 # -------------------------------------------------------
-load_dotenv()
-KNOWLEDGE_FOLDER = "Knowledge_Repo"
-PERSIST_DIR = "chroma_db"
-
 st.set_page_config(page_title="RFP Proposal AI Generator", layout="wide")
 
 # Custom CSS for Professional Look (Mimics AutoRFP style)
@@ -110,367 +94,7 @@ div.stButton > button:hover {
 # -------------------------------------------------------
 # 2. UTILITIES
 # -------------------------------------------------------
-
-def extract_text(file):
-    """Extract text from PDF or DOCX"""
-    if file.name.endswith(".pdf"):
-        reader = PdfReader(file)
-        return "\n".join([p.extract_text() or "" for p in reader.pages])
-    elif file.name.endswith(".docx"):
-        doc = docx.Document(file)
-        return "\n".join([p.text for p in doc.paragraphs])
-    return ""
-
-# def build_knowledge_base(folder=KNOWLEDGE_FOLDER, persist_dir=PERSIST_DIR):
-#     """Build or load persistent Chroma vector DB from Knowledge_Repo"""
-#     # ... (rest of build_knowledge_base remains the same)
-#     os.makedirs(folder, exist_ok=True)
-#     os.makedirs(persist_dir, exist_ok=True)
-
-#     embedding_model = AzureOpenAIEmbeddings(
-#         model="text-embedding-ada-002",
-#         azure_endpoint=os.getenv("AZURE_OPENAI_EMD_ENDPOINT"),
-#         api_key=os.getenv("AZURE_OPENAI_EMD_KEY"),
-#         api_version=os.getenv("AZURE_OPENAI_EMD_VERSION")
-#     )
-
-#     if os.listdir(persist_dir):
-#         return Chroma(
-#             embedding_function=embedding_model,
-#             # persist_directory=persist_dir,
-#             collection_name="rfp_responses"
-#         )
-
-#     docs = []
-#     for f in os.listdir(folder):
-#         if f.endswith((".pdf", ".docx")):
-#             path = os.path.join(folder, f)
-#             text = extract_text(open(path, "rb"))
-#             if text.strip():
-#                 docs.append(LDocument(page_content=text, metadata={"source": f}))
-
-#     if not docs:
-#         raise ValueError(f"No readable files found in {folder}")
-
-#     return Chroma.from_documents(
-#         documents=docs,
-#         embedding=embedding_model,
-#         persist_directory=persist_dir,
-#         collection_name="rfp_responses"
-#     )
-
-from langchain_chroma import Chroma
-from langchain_openai import AzureOpenAIEmbeddings
-from langchain_core.documents import Document as LDocument
-import os
-import shutil
-
-def build_knowledge_base(folder=KNOWLEDGE_FOLDER, persist_dir=PERSIST_DIR):
-    """Load or rebuild a local Chroma vectorstore safely (no tenant errors)."""
-    os.makedirs(folder, exist_ok=True)
-    os.makedirs(persist_dir, exist_ok=True)
-
-    embedding_model = AzureOpenAIEmbeddings(
-        model="text-embedding-ada-002",
-        azure_endpoint=os.getenv("AZURE_OPENAI_EMD_ENDPOINT"),
-        api_key=os.getenv("AZURE_OPENAI_EMD_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_EMD_VERSION")
-    )
-
-    def create_fresh_chroma():
-        docs = []
-        for f in os.listdir(folder):
-            if f.endswith((".pdf", ".docx")):
-                path = os.path.join(folder, f)
-                try:
-                    text = extract_text(open(path, "rb"))
-                    if text.strip():
-                        docs.append(LDocument(page_content=text, metadata={"source": f}))
-                except Exception as e:
-                    print(f"⚠️ Skipped {f}: {e}")
-
-        if not docs:
-            raise ValueError(f"No readable files found in {folder}")
-
-        print("📘 Creating new ChromaDB with", len(docs), "documents...")
-        return Chroma.from_documents(
-            documents=docs,
-            embedding=embedding_model,
-            persist_directory=persist_dir,
-            collection_name="rfp_responses"
-        )
-
-    try:
-        print("📂 Attempting to load existing DB from", persist_dir)
-        return Chroma(
-            embedding_function=embedding_model,
-            persist_directory=persist_dir,
-            collection_name="rfp_responses"
-        )
-    except Exception as e:
-        print(f"⚠️ Error loading existing DB: {e}. Rebuilding fresh...")
-        shutil.rmtree(persist_dir, ignore_errors=True)
-        os.makedirs(persist_dir, exist_ok=True)
-        return create_fresh_chroma()
-
-
-
-def apply_bullet_to_para(paragraph, list_id='1'):
-    """
-    Applies a dot bullet style (list level 0) using its XML structure.
-    Uses numId='1' which is often the default bullet style in templates.
-    """
-    pPr = paragraph._element.get_or_add_pPr()
-    numPr = OxmlElement('w:numPr')
-    
-    # Set the list level (0 is the main level)
-    ilvl = OxmlElement('w:ilvl')
-    ilvl.set(qn('w:val'), '0')
-    
-    # Set the list ID (Most default templates use ID '1' for the first bullet definition)
-    numId = OxmlElement('w:numId')
-    numId.set(qn('w:val'), list_id)
-    
-    numPr.append(ilvl)
-    numPr.append(numId)
-    pPr.append(numPr)
-
-
-def insert_executive_summary_into_template(
-    template_path,
-    summary_text,
-    objective_text=None,
-    scope_text=None,
-    resource_schedule_text=None,
-    communication_plan_text=None,
-):
-    """
-    Replace placeholders in the template:
-    <<EXEC_SUMMARY>>, <<OBJECTIVE>>, <<SCOPE_TEXT>>, <<RESOURCE_SCHEDULE>>, <<COMMUNICATION_PLAN>>
-    Now includes robust bullet point handling.
-    """
-
-    doc = Document(template_path)
-
-    def set_cell_shading(cell, fill_color):
-        """Add shading (background color) to a table cell."""
-        tc_pr = cell._element.tcPr
-        shd = OxmlElement("w:shd")
-        shd.set(qn("w:val"), "clear")
-        shd.set(qn("w:color"), "auto")
-        shd.set(qn("w:fill"), fill_color)
-        tc_pr.append(shd)
-
-    def set_table_border_white(table, cell_margin=150):
-        """Set all table borders to white (for clean, minimal look)."""
-        tbl = table._element
-        tbl_pr = tbl.tblPr
-        tbl_borders = OxmlElement("w:tblBorders")
-
-        for border_name in ["top", "left", "bottom", "right", "insideH", "insideV"]:
-            border_el = OxmlElement(f"w:{border_name}")
-            border_el.set(qn("w:val"), "single")
-            border_el.set(qn("w:sz"), "4")  # thin border
-            border_el.set(qn("w:space"), "0")
-            border_el.set(qn("w:color"), "FFFFFF")  # white
-            tbl_borders.append(border_el)
-
-        tbl_pr.append(tbl_borders)
-
-
-    def insert_styled_table(parent, headers, rows):
-        """Create a table styled similar to RFP objective section."""
-        table = parent.add_table(rows=len(rows) + 1, cols=len(headers))
-        table.style = "Table Grid"
-        table.autofit = True
-
-        # Header row styling
-        hdr_cells = table.rows[0].cells
-        for i, h in enumerate(headers):
-            hdr_cells[i].text = h.strip()
-            set_cell_shading(hdr_cells[i], "008FD3")  # blue header
-            for run in hdr_cells[i].paragraphs[0].runs:
-                run.font.bold = True
-                run.font.color.rgb = RGBColor(255, 255, 255)
-            hdr_cells[i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
-            hdr_cells[i].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-
-        # Data rows
-        for r, row_data in enumerate(rows):
-            cells = table.rows[r + 1].cells
-            for c, val in enumerate(row_data):
-                cells[c].text = str(val).strip()
-                set_cell_shading(cells[c], "E7EEF7")  # light gray row
-                cells[c].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                cells[c].paragraphs[0].alignment = (
-                    WD_ALIGN_PARAGRAPH.LEFT if c == 0 else WD_ALIGN_PARAGRAPH.LEFT
-                )
-
-        # Set uniform width
-        for row in table.rows:
-            for cell in row.cells:
-                cell.width = Inches(3)
-
-        # Apply white borders
-        set_table_border_white(table)
-
-        return table
-
-    def replace_placeholder(doc, placeholder, new_text):
-        if not new_text:
-            return
-
-        for para in doc.paragraphs:
-            if placeholder in "".join(run.text for run in para.runs):
-                parent = para._element.getparent()
-                idx = parent.index(para._element)
-                parent.remove(para._element)
-
-                lines = [line.strip() for line in new_text.split("\n") if line.strip()]
-                new_elements = []  # collect to insert once
-
-                i = 0
-                while i < len(lines):
-                    line = lines[i]
-
-                    # Markdown-style table
-                    if line.startswith("|") and "|" in line:
-                        table_lines = []
-                        while i < len(lines) and lines[i].startswith("|"):
-                            table_lines.append(lines[i])
-                            i += 1
-                        headers = [h.strip("* ") for h in table_lines[0].strip("|").split("|")]
-                        rows = [
-                            [c.strip() for c in r.strip("|").split("|")]
-                            for r in table_lines[2:]
-                        ]
-                        table = insert_styled_table(doc, headers, rows)
-                        new_elements.append(table._element)
-                        continue
-
-                    # Section heading
-                    if line.startswith("**") or line.startswith("###"):
-                        header_text = line.strip("*# ").rstrip(":")
-                        new_para = doc.add_paragraph(header_text)
-                        new_para.style = "Table Column Heading"
-                        new_para.paragraph_format.space_after = Pt(4)
-                        new_elements.append(new_para._element)
-                        i += 1
-                        continue
-
-                    # Markdown bullets (FIXED: Use apply_bullet_to_para for robustness)
-                    if line.startswith("- ") or line.startswith("• "):
-                        bullet_text = line[2:].strip() if line.startswith("- ") else line[1:].strip()
-                        new_para = doc.add_paragraph(bullet_text, style="List Bullet 2")
-                        new_para.paragraph_format.left_indent = Pt(18)
-                        new_para.paragraph_format.space_after = Pt(2)
-                        new_elements.append(new_para._element)
-                        i += 1
-                        continue
-
-                    # Regular text
-                    new_para = doc.add_paragraph(line)
-                    new_elements.append(new_para._element)
-                    i += 1
-
-                # ⚡️ Insert all new elements once
-                for element in reversed(new_elements):
-                    parent.insert(idx, element)
-                return
-
-    # Replace placeholders with sections
-    replace_placeholder(doc, "<<EXEC_SUMMARY>>", summary_text)
-    replace_placeholder(doc, "<<OBJECTIVE>>", objective_text)
-    replace_placeholder(doc, "<<SCOPE_TEXT>>", scope_text)
-    replace_placeholder(doc, "<<RESOURCE_SCHEDULE>>", resource_schedule_text)
-    replace_placeholder(doc, "<<COMMUNICATION_PLAN>>", communication_plan_text)
-
-    return doc
-
-
-def generate_exec_summary_and_objective(reference_text, condensed_rfp, num_interfaces=113):
-    # ... (function body remains the same)
-    client = AzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_FRFP_ENDPOINT"),
-        api_key=os.getenv("AZURE_OPENAI_FRFP_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_FRFP_VERSION")
-    )
-
-    prompt = get_executive_summary_and_objective_prompt(reference_text, condensed_rfp, num_interfaces)
-
-    response = client.chat.completions.create(
-        model="Codetest",
-        temperature=0.3,
-        max_tokens=2000,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    full_output = response.choices[0].message.content.strip()
-
-    # --- Split into Executive Summary and Objective ---
-    exec_match = re.search(r"\*\*?Executive Summary\*\*?\s*(.*?)\s*(?=\*\*?Objective\*\*?)", full_output, re.S | re.I)
-    obj_match = re.search(r"\*\*?Objective\*\*?\s*(.*)", full_output, re.S | re.I)
-
-    exec_text = exec_match.group(1).strip() if exec_match else full_output
-    obj_text = obj_match.group(1).strip() if obj_match else ""
-
-    return exec_text, obj_text
-
-def generate_scope_sections(reference_text, condensed_rfp, num_interfaces=None):
-    # ... (function body remains the same)
-    client = AzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_FRFP_ENDPOINT"),
-        api_key=os.getenv("AZURE_OPENAI_FRFP_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_FRFP_VERSION")
-    )
-
-    prompt = get_scope_prereq_assumptions_prompt(reference_text, condensed_rfp, num_interfaces)
-
-    response = client.chat.completions.create(
-        model="Codetest",
-        temperature=0.3,
-        max_tokens=1200,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.choices[0].message.content.strip()
-
-def generate_resource_schedule_and_commercial(reference_text, condensed_rfp):
-    # ... (function body remains the same)
-    client = AzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_FRFP_ENDPOINT"),
-        api_key=os.getenv("AZURE_OPENAI_FRFP_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_FRFP_VERSION")
-    )
-
-    prompt = get_resource_schedule_and_commercial_prompt(reference_text, condensed_rfp)
-
-    response = client.chat.completions.create(
-        model="Codetest",
-        temperature=0.3,
-        max_tokens=2000,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.choices[0].message.content.strip()
-
-def generate_communication_plan(reference_text, condensed_rfp):
-    # ... (function body remains the same)
-    client = AzureOpenAI(
-        azure_endpoint=os.getenv("AZURE_OPENAI_FRFP_ENDPOINT"),
-        api_key=os.getenv("AZURE_OPENAI_FRFP_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_FRFP_VERSION")
-    )
-
-    prompt = get_communication_plan_prompt(reference_text, condensed_rfp)
-    response = client.chat.completions.create(
-        model="Codetest",
-        temperature=0.3,
-        max_tokens=2500,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    return response.choices[0].message.content.strip()
+# The pipeline stages and DOCX template filling live in Modules/ so the batch CLI (batch.py) shares them.
 
 
 # -------------------------------------------------------
@@ -512,156 +136,203 @@ rfp_uploader = st.file_uploader(
     label_visibility="collapsed"
 )
 
+inventory_uploader = st.file_uploader(
+    "Optional: ICO inventory (CSV or XLSX) for the appendix",
+    type=["csv", "xlsx"],
+    key="inventory_up",
+    help="Export of the PI/PO Integration Configuration Objects. Its row count replaces the detected interface count."
+)
 
-# Consolidate uploaded file check
-uploaded_file = rfp_uploader
-
-# --- Conditional Logic ---
-if uploaded_file:
-
-        st.markdown("### ✍️ Step 2: Generating Your Proposal Response")
-        with st.spinner("Analyzing RFP and preparing your AI-driven proposal response..."):
-            # Call your main generation logic here
-            # result = generate_proposal(uploaded_file, num_interfaces)
-
-            with st.status("🚀 Generating Proposal Sections...", expanded=True) as status:
-        
-                # STEP 1: Extract content
-                st.write("1/6 🔎 Extracting RFP content...")
-                rfp_text = extract_text(uploaded_file)
-                time.sleep(1)
-                # --- 🔍 Auto-detect number of interfaces / integrations from RFP text ---
-
-                rfp_text = rfp_text.replace(",", "")  # remove commas like "1,700"
-
-                # Define all possible keywords (prioritizing ICOs first)
-                priority_keywords = ["ICOs?", "iCos?", "integration configuration objects?"]
-                general_keywords = [
-                    "interfaces?", "integration points?", "flows?", "connections?",
-                    "touchpoints?", "IFlows?", "mappings?", "adapters?"
-                ]
-
-                # First: look specifically for ICO mentions
-                ico_pattern = r'~?\b(\d{1,5})\s*(?:' + "|".join(priority_keywords) + r')\b'
-                ico_matches = re.findall(ico_pattern, rfp_text, flags=re.IGNORECASE)
-
-                if ico_matches:
-                    num_interfaces = max(map(int, ico_matches))
-                    detected_type = "ICOs"
-                else:
-                    # fallback to general terms like 'interfaces' if ICOs not found
-                    pattern = r'~?\b(\d{1,5})\s*(?:' + "|".join(general_keywords) + r')\b'
-                    matches = re.findall(pattern, rfp_text, flags=re.IGNORECASE)
 
-                    if matches:
-                        num_interfaces = max(map(int, matches))
-                        detected_type = "interfaces"
+# The knowledge base is shared by every session on this server; reopen it after editing Knowledge_Repo.
+with st.sidebar:
+    if st.button("🔄 Reload knowledge base"):
+        invalidate_knowledge_base()
+        invalidate_lexical_index()
+        st.toast("Knowledge base will be reopened on the next run.")
+    st.toggle("⏱️ Performance panel", key="perf_panel", help="Show stage timings, token usage and cache hits.")
+
+
+# Section that produces each review tab, in tab order.
+TAB_SECTIONS = ["exec_summary", "exec_summary", "scope", "resource_schedule", "communication_plan"]
+TAB_LABELS = ["Executive Summary", "Objective", "Scope & Assumptions", "Resource & Schedule", "Communication Plan"]
+# Pipeline stages shown as steps in the status box, numbered in STAGES order.
+STAGE_LABELS = {
+    "extract": "🔎 Extracting RFP content",
+    "detect": "📊 Detecting the number of interfaces",
+    "inventory": "📋 Reading the ICO inventory",
+    "condense": "🗜️ Condensing RFP into a proposal brief",
+    "retrieve": "📚 Loading knowledge base and retrieving reference documents",
+    "generate": f"✍️ Generating {len(SECTIONS)} proposal sections "
+                + ("in one request" if GENERATION_MODE == "combined" else "in parallel"),
+    "render": "🧾 Compiling content into DOCX template",
+}
+STAGE_STEPS = {stage: f"{i}/{len(STAGES)} {STAGE_LABELS[stage]}" for i, stage in enumerate(STAGES, 1)}
+JOB_POLL_SECONDS = 1.0
+
+
+def request_regeneration(section_key):
+    """Button callback: bypass the response cache for one section on the next run."""
+    st.session_state.setdefault("regenerate", set()).add(section_key)
+
+
+def request_retry():
+    st.session_state["retry"] = True
+
+
+def tab_contents(artifacts):
+    """Text per review tab: the final sections once generated, else the text streamed so far."""
+    sections = artifacts.get("sections", {})
+    contents = []
+    for i, key in enumerate(TAB_SECTIONS):
+        if key in sections:
+            contents.append(sections[key][i] if key == "exec_summary" else sections[key])
+        elif TAB_SECTIONS.index(key) == i and f"partial:{key}" in artifacts:
+            # Objective is split out of the Executive Summary output once it completes.
+            contents.append(artifacts[f"partial:{key}"] + " ▌")
+        else:
+            contents.append(None)
+    return contents
+
+
+def show_performance(metrics):
+    """Where the time and tokens of a finished run went."""
+    with st.expander("⏱️ Performance", expanded=True):
+        st.caption(f"Run {metrics['run_id']}: {metrics['seconds']:.1f}s total")
+        st.dataframe([{"Stage": stage, "Seconds": v["seconds"]} for stage, v in metrics["stages"].items()],
+                     hide_index=True)
+        if metrics["llm"]:
+            st.dataframe([
+                {"Purpose": purpose, "Calls": v.get("calls", 0), "Seconds": v.get("seconds", 0),
+                 "Prompt tokens": v.get("prompt_tokens", 0), "Completion tokens": v.get("completion_tokens", 0)}
+                for purpose, v in metrics["llm"].items()
+            ], hide_index=True)
+        st.dataframe([
+            {"Cache": cache, "Hits": v.get("hit", 0), "Misses": v.get("miss", 0),
+             "Hit rate": f"{v.get('hit', 0) / ((v.get('hit', 0) + v.get('miss', 0)) or 1):.0%}"}
+            for cache, v in metrics["cache"].items()
+        ], hide_index=True)
+        retrieval = ", ".join(f"{source}: {v['hits']}" for source, v in metrics["retrieval"].items())
+        if retrieval:
+            st.caption(f"Retrieval hits — {retrieval}")
+
+
+def show_expired(job_id):
+    """The job was pruned (see RFP_JOB_TTL) while this page showed it; forget it so the upload can be rerun."""
+    delete_job(job_id)
+    st.warning("⌛ This job has expired and its results were removed.")
+    st.button("🔁 Generate again", on_click=request_retry)
+
+
+def show_job(job_id, polling):
+    """
+    Status, review tabs and download for one job, read from the job store.
+    While the job is active this runs as a fragment every JOB_POLL_SECONDS.
+    """
+    job = get_job(job_id)
+    if job is None or (job.status == "done" and not os.path.exists(job_output_path(job_id))):
+        if st.session_state.get("retry"):
+            st.rerun()
+        show_expired(job_id)
+        return
+    artifacts = get_artifacts(job_id)
+    active = job.status in ("queued", "running")
+    if polling and not active:
+        st.rerun()  # finished: redraw once without polling
+    if st.session_state.get("regenerate") or st.session_state.get("retry"):
+        st.rerun()  # a button in this fragment asked for a new run; submit it from the full script
+
+    section_log = artifacts.get("section_log", [])
+    progress = len(job.timings) + (len(section_log) / len(SECTIONS) if job.stage == "generate" else 0)
+    pct = int(100 * progress / len(STAGES))
+    if job.status == "failed":
+        label, state = "Generation Failed", "error"
+    elif job.status == "done":
+        label, state = "✅ Proposal Content Complete!", "complete"
+    else:
+        label, state = f"🚀 Generating Proposal Sections... ({pct}% Complete)", "running"
+
+    with st.status(label, state=state, expanded=job.status != "done"):
+        if job.status == "queued":
+            st.write("⏳ Waiting for a free worker...")
+        for stage, step in STAGE_STEPS.items():
+            if stage in job.timings:
+                st.success(f"{step} ✅ ({job.timings[stage]:.1f}s)")
+            elif stage == job.stage:
+                st.write(f"{step}...")
+                if stage == "extract" and "pages" in artifacts:
+                    pages = artifacts["pages"]
+                    st.progress(pages["done"] / pages["total"], text=f"Extracted {pages['done']}/{pages['total']} pages")
+            if stage == "generate":
+                for entry in section_log:
+                    if entry["error"]:
+                        st.error(f"❌ {entry['label']} failed: {entry['error']}")
                     else:
-                        num_interfaces = None
-                        detected_type = None
-
-                # Display result
-                if num_interfaces:
-                    st.info(f"📊 Detected approximately **{num_interfaces} {detected_type}** in RFP.")
+                        st.success(f"✅ {entry['label']} generated.")
+            if stage == "detect" and "detection" in artifacts:
+                detection = artifacts["detection"]
+                if detection["count"]:
+                    st.info(f"📊 Detected approximately **{detection['count']} {detection['kind']}** in RFP.")
+                    st.caption(f"…{detection['snippet']}…")
                 else:
                     st.warning("⚠️ No explicit integration count detected — using default or manual input.")
-
-                if len(rfp_text.strip()) < 100:
-                    status.update(label="Extraction Failed", state="error", expanded=False)
-                    st.error("Could not extract enough text from the document. Please check the file.")
-                    st.stop()
-                
-                st.success("1/6 ✅ RFP content extracted!")
-                status.update(label="🚀 Generating Proposal Sections... (20% Complete)", state="running")
-
-                # STEP 2: Build or load knowledge base & Retrieve context
-                st.write("2/6 📚 Loading knowledge base and retrieving reference documents...")
-                knowledge_db = build_knowledge_base()
-                retriever = knowledge_db.as_retriever(search_kwargs={"k": 3})
-                ref_docs = retriever.invoke(rfp_text)
-                reference_text = "\n\n".join([d.page_content for d in ref_docs])
-                st.success(f"2/6 ✅ Retrieved {len(ref_docs)} relevant reference documents!")
-                status.update(label="🚀 Generating Proposal Sections... (40% Complete)", state="running")
-
-
-                
-                # STEP 3: Generate Core Sections
-                st.write("3/6 ✍️ Generating Executive Summary and Objective...")
-                exec_summary, objective = generate_exec_summary_and_objective(reference_text, rfp_text, num_interfaces)
-                st.success("3/6 ✅ Executive Summary & Objective generated.")
-                status.update(label="🚀 Generating Proposal Sections... (60% Complete)", state="running")
-
-                # STEP 4: Generate Scope Sections
-                st.write("4/6 🧩 Generating Scope, Assumptions, and Prerequisites...")
-                scope_text = generate_scope_sections(reference_text, rfp_text, num_interfaces)
-                st.success("4/6 ✅ Scope and Assumptions section generated.")
-                status.update(label="🚀 Generating Proposal Sections... (75% Complete)", state="running")
-                
-                # STEP 5: Resource Schedule & Commercials
-                st.write("5/6 📊 Generating Resource Schedule and Commercials...")
-                resource_schedule_text = generate_resource_schedule_and_commercial(reference_text, rfp_text)
-                st.success("5/6 ✅ Resource Schedule and Commercials generated.")
-                status.update(label="🚀 Generating Proposal Sections... (85% Complete)", state="running")
-
-                # STEP 6: Communication Plan
-                st.write("6/6 📢 Generating Communication Plan...")
-                communication_plan_text = generate_communication_plan(reference_text, rfp_text)
-                st.success("6/6 ✅ Communication Plan generated.")
-                status.update(label="✅ Proposal Content Complete!", state="complete", expanded=False)
-
-            
-            # --- Proposal Preview ---
-            st.markdown("## 🔍 Step 2: Review Content")
-            st.info("Review the AI-generated sections below before downloading the final document.")
-            
-            tab1, tab2, tab3, tab4, tab5 = st.tabs([
-                "Executive Summary", "Objective", "Scope & Assumptions", 
-                "Resource & Schedule", "Communication Plan"
-            ])
-            
-            with tab1: st.markdown(exec_summary)
-            with tab2: st.markdown(objective)
-            with tab3: st.markdown(scope_text)
-            with tab4: st.markdown(resource_schedule_text)
-            with tab5: st.markdown(communication_plan_text)
-            
-            # --- Download Section ---
-            st.markdown("---")
-            st.markdown("## 📦 Step 3: Final Document Generation & Download")
-            template_path = "Template/PIPO TO IS Response Template.docx"
-
-            if not os.path.exists(template_path):
-                st.error(f"Template not found at {template_path}. Cannot generate final DOCX.")
-            else:
-                st.write("Compiling content into DOCX template...")
-                final_doc = insert_executive_summary_into_template(
-                    template_path,
-                    summary_text=exec_summary,
-                    objective_text=objective,
-                    scope_text=scope_text,
-                    resource_schedule_text=resource_schedule_text,
-                    communication_plan_text=communication_plan_text
-                )
-
-                buffer = BytesIO()
-                final_doc.save(buffer)
-                buffer.seek(0)
-                
-                st.markdown("<br>", unsafe_allow_html=True)
-                st.download_button(
-                    label="🚀 Download Final RFP Proposal (DOCX)",
-                    data=buffer,
-                    file_name=f"RFP_Response_{uploaded_file.name.split('.')[0]}.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                )
-
-
-            st.success("✅ Proposal response generated successfully!")
-            # st.write(result)
-else:
-    st.info("Upload your RFP and enter configuration details, then click **Generate Proposal Response**.")
-
-
+            if stage == "inventory" and "inventory" in artifacts:
+                inventory = artifacts["inventory"]
+                st.info(f"📋 ICO inventory: **{inventory['count']} ICOs** "
+                        f"({inventory['duplicates']} duplicate rows removed) will be listed in the appendix.")
+            if stage == "inventory" and "inventory_error" in artifacts:
+                st.error(f"❌ Could not read the ICO inventory: {artifacts['inventory_error']}")
+        if job.status == "failed":
+            st.error(f"❌ {job.error}")
+            st.button("🔁 Retry", on_click=request_retry)
+
+    contents = tab_contents(artifacts)
+    if any(contents):
+        st.markdown("## 🔍 Step 2: Review Content")
+        st.info("Review the AI-generated sections below before downloading the final document.")
+        for i, (tab, content) in enumerate(zip(st.tabs(TAB_LABELS), contents)):
+            with tab:
+                if content:
+                    st.markdown(content)
+                if job.status == "done":
+                    st.button("🔁 Regenerate", key=f"regen_{i}", on_click=request_regeneration, args=(TAB_SECTIONS[i],),
+                              help="Discard the cached response and generate this section again.")
+
+    if job.status == "done":
+        st.markdown("---")
+        st.markdown("## 📦 Step 3: Final Document Generation & Download")
+        try:
+            with open(job_output_path(job_id), "rb") as fh:
+                docx_bytes = fh.read()
+        except FileNotFoundError:  # pruned since the check above
+            show_expired(job_id)
+            return
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.download_button(
+            label="🚀 Download Final RFP Proposal (DOCX)",
+            data=docx_bytes,
+            file_name=output_file_name(job.name),
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            on_click="ignore"
+        )
+        st.success("✅ Proposal response generated successfully!")
+        if st.session_state.get("perf_panel") and "metrics" in artifacts:
+            show_performance(artifacts["metrics"])
 
 
+# Consolidate uploaded file check
+uploaded_file = rfp_uploader
 
+# --- Conditional Logic ---
+if uploaded_file:
+    st.markdown("### ✍️ Step 2: Generating Your Proposal Response")
+    # The pipeline runs on the shared job workers; reruns and other sessions with the same upload reuse its results.
+    job_id = submit_job(
+        uploaded_file, inventory_uploader,
+        regenerate=st.session_state.pop("regenerate", set()),
+        retry=st.session_state.pop("retry", False)
+    )
+    polling = get_job(job_id).status in ("queued", "running")
+    st.fragment(show_job, run_every=JOB_POLL_SECONDS if polling else None)(job_id, polling)
+else:
+    st.info("Upload your RFP and enter configuration details, then click **Generate Proposal Response**.")
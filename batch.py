@@ -0,0 +1,13 @@
+"""
+Headless batch run: python batch.py <input_dir> <output_dir> [--workers N] [--force]
+Writes RFP_Response_<name>.docx per RFP plus report.csv with per-stage timings.
+"""
+import sys
+from dotenv import load_dotenv
+load_dotenv()  # before Modules imports: they read their settings from the environment
+from Modules.pipeline import main
+
+
+# The guard matters: PDF extraction workers re-import this module under forkserver/spawn.
+if __name__ == "__main__":
+    sys.exit(main())
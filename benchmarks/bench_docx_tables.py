@@ -0,0 +1,119 @@
+"""
+Benchmark rendering a markdown table into the response template.
+
+Compares the original python-docx path from app.py (add_table, then text,
+shading and alignment set cell by cell, then a second pass for widths) with
+Modules.docx_tables (markdown parser plus one-shot w:tbl XML build).
+
+    python benchmarks/bench_docx_tables.py [--rows 10 1000 10000] [--cols 5] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from docx.enum.table import WD_ALIGN_VERTICAL  # noqa: E402
+from docx.enum.text import WD_ALIGN_PARAGRAPH  # noqa: E402
+from docx.oxml import OxmlElement  # noqa: E402
+from docx.oxml.ns import qn  # noqa: E402
+from docx.shared import Inches, RGBColor  # noqa: E402
+from Modules.docx_tables import parse_markdown_table, styled_table_element  # noqa: E402
+from Modules.docx_template import get_compiled_template  # noqa: E402
+from Modules.pipeline import TEMPLATE_PATH  # noqa: E402
+
+
+def markdown_table(rows, cols):
+    lines = ["| " + " | ".join(f"**Column {c + 1}**" for c in range(cols)) + " |"]
+    lines.append("|" + "---|" * cols)
+    for r in range(rows):
+        lines.append("| " + " | ".join(f"ICO_{r:05d}_{c} SAP ECC → S/4HANA" for c in range(cols)) + " |")
+    return lines
+
+
+def legacy_table(doc, table_lines):
+    """The table branch of replace_placeholder as it was in app.py."""
+    def set_cell_shading(cell, fill_color):
+        tc_pr = cell._element.tcPr
+        shd = OxmlElement("w:shd")
+        shd.set(qn("w:val"), "clear")
+        shd.set(qn("w:color"), "auto")
+        shd.set(qn("w:fill"), fill_color)
+        tc_pr.append(shd)
+
+    headers = [h.strip("* ") for h in table_lines[0].strip("|").split("|")]
+    rows = [[c.strip() for c in r.strip("|").split("|")] for r in table_lines[2:]]
+    table = doc.add_table(rows=len(rows) + 1, cols=len(headers))
+    table.style = "Table Grid"
+    table.autofit = True
+    hdr_cells = table.rows[0].cells
+    for i, h in enumerate(headers):
+        hdr_cells[i].text = h.strip()
+        set_cell_shading(hdr_cells[i], "008FD3")
+        for run in hdr_cells[i].paragraphs[0].runs:
+            run.font.bold = True
+            run.font.color.rgb = RGBColor(255, 255, 255)
+        hdr_cells[i].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+        hdr_cells[i].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
+    for r, row_data in enumerate(rows):
+        cells = table.rows[r + 1].cells
+        for c, val in enumerate(row_data):
+            cells[c].text = str(val).strip()
+            set_cell_shading(cells[c], "E7EEF7")
+            cells[c].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
+            cells[c].paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.LEFT
+    for row in table.rows:
+        for cell in row.cells:
+            cell.width = Inches(3)
+    tbl = table._element
+    tbl_borders = OxmlElement("w:tblBorders")
+    for border_name in ["top", "left", "bottom", "right", "insideH", "insideV"]:
+        border_el = OxmlElement(f"w:{border_name}")
+        border_el.set(qn("w:val"), "single")
+        border_el.set(qn("w:sz"), "4")
+        border_el.set(qn("w:space"), "0")
+        border_el.set(qn("w:color"), "FFFFFF")
+        tbl_borders.append(border_el)
+    tbl.tblPr.append(tbl_borders)
+    return tbl
+
+
+def fast_table(doc, table_lines):
+    return styled_table_element(doc, *parse_markdown_table(table_lines))
+
+
+def best_of(func, template, table_lines, repeat):
+    """Best wall-clock seconds of func on a fresh copy of the template."""
+    best = float("inf")
+    for _ in range(repeat):
+        doc = template.render({})
+        start = time.perf_counter()
+        func(doc, table_lines)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--cols", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    template = get_compiled_template(os.path.join(REPO_ROOT, TEMPLATE_PATH))
+    results = []
+    for rows in args.rows:
+        table_lines = markdown_table(rows, args.cols)
+        # The legacy path is quadratic in rows (table.rows is rebuilt per access); time big tables once.
+        legacy = best_of(legacy_table, template, table_lines, args.repeat if rows <= 1000 else 1)
+        fast = best_of(fast_table, template, table_lines, args.repeat)
+        results.append({"rows": rows, "cols": args.cols, "legacy_ms": round(legacy * 1000, 1), "fast_ms": round(fast * 1000, 1)})
+        print(f"{rows:>6} rows  legacy {legacy * 1000:10.1f} ms  fast {fast * 1000:8.1f} ms  "
+              f"x{legacy / fast:.0f}", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
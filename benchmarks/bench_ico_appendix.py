@@ -0,0 +1,106 @@
+"""
+Benchmark the ICO appendix on synthetic inventory exports.
+
+Times reading and de-duplicating a CSV or XLSX inventory, appending the
+appendix table to the response template and saving the DOCX.
+
+    python benchmarks/bench_ico_appendix.py [--rows 1000 20000] [--format csv xlsx]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+from Modules.docx_template import get_compiled_template  # noqa: E402
+from Modules.ico_inventory import append_ico_appendix, read_inventory  # noqa: E402
+from Modules.pipeline import TEMPLATE_PATH  # noqa: E402
+
+
+HEADER = ["Sender Party", "Sender Component", "Interface", "Namespace", "Receiver Component",
+          "Sender Adapter Type", "Receiver Adapter Type"]
+SYSTEMS = ["ECC_PRD", "S4H_PRD", "CRM_PRD", "SFTP_BANK", "ARIBA", "SALESFORCE", "EWM_PRD", "MES_PLANT01"]
+ADAPTERS = ["IDoc", "SOAP", "SFTP", "REST", "JDBC", "RFC", "AS2"]
+
+
+def synthetic_rows(rows, duplicate_share=0.1, seed=7):
+    """Inventory rows where about duplicate_share of them repeat an earlier row with different case/spacing."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(rows):
+        if out and rng.random() < duplicate_share:
+            row = list(rng.choice(out))
+            row[2] = "  " + row[2].upper() + " "
+        else:
+            row = ["", rng.choice(SYSTEMS), f"SI_Order_{i:05d}_Out", f"urn:acme.com:{rng.choice(['sd', 'mm', 'fi'])}",
+                   rng.choice(SYSTEMS), rng.choice(ADAPTERS), rng.choice(ADAPTERS)]
+        out.append(row)
+    return out
+
+
+class NamedBytesIO(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def export(rows, fmt):
+    if fmt == "csv":
+        text = io.StringIO()
+        writer = csv.writer(text, delimiter=";")
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+        return NamedBytesIO(text.getvalue().encode("utf-8-sig"), "inventory.csv")
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return NamedBytesIO(buffer.getvalue(), "inventory.xlsx")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 20000])
+    parser.add_argument("--format", nargs="+", default=["csv", "xlsx"], choices=["csv", "xlsx"])
+    args = parser.parse_args()
+
+    template = get_compiled_template(os.path.join(REPO_ROOT, TEMPLATE_PATH))
+    results = []
+    for fmt in args.format:
+        for rows in args.rows:
+            file = export(synthetic_rows(rows), fmt)
+            start = time.perf_counter()
+            inventory = read_inventory(file)
+            read_s = time.perf_counter() - start
+
+            doc = template.render({})
+            start = time.perf_counter()
+            append_ico_appendix(doc, inventory)
+            append_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            doc.save(io.BytesIO())
+            save_s = time.perf_counter() - start
+
+            results.append({
+                "format": fmt, "rows": rows, "icos": inventory.count, "duplicates": inventory.duplicates,
+                "read_ms": round(read_s * 1000, 1), "append_ms": round(append_s * 1000, 1),
+                "save_ms": round(save_s * 1000, 1),
+            })
+            print(f"{fmt:>4} {rows:>6} rows  read {read_s * 1000:8.1f} ms  append {append_s * 1000:8.1f} ms  "
+                  f"save {save_s * 1000:8.1f} ms  ({inventory.count} ICOs, {inventory.duplicates} duplicates)",
+                  file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark interface-count detection on synthetic RFPs.
+
+Compares the original inline detector from app.py (comma stripping plus two
+re.findall passes with patterns built per run) with
+Modules.interface_detection.detect_interfaces.
+
+    python benchmarks/bench_interface_detection.py [--pages 10 100 500 2000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Modules.interface_detection import detect_interfaces  # noqa: E402
+
+
+FILLER = (
+    "The client operates SAP ECC 6.0 with SAP PI/PO 7.5 as its integration middleware. "
+    "The vendor shall migrate all integration scenarios to SAP Integration Suite on BTP, "
+    "including testing, cutover and hypercare, within the agreed timeline of 17 weeks. "
+)
+MENTIONS = [
+    "approximately {n} interfaces", "{n} integration points", "about {n:,} ICOs",
+    "{n} IFlows", "{n} adapters", "{n} mappings", "{n} connections",
+]
+
+
+def synthetic_rfp(pages, chars_per_page=3000, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(pages):
+        page = []
+        while sum(map(len, page)) < chars_per_page:
+            page.append(FILLER)
+            if rng.random() < 0.3:
+                page.append(f"The landscape has {rng.choice(MENTIONS).format(n=rng.randint(5, 2500))}. ")
+        out.append("".join(page))
+    return "\n".join(out)
+
+
+def legacy_detect(rfp_text):
+    """The detector as it was inlined in app.py."""
+    rfp_text = rfp_text.replace(",", "")
+    priority_keywords = ["ICOs?", "iCos?", "integration configuration objects?"]
+    general_keywords = [
+        "interfaces?", "integration points?", "flows?", "connections?",
+        "touchpoints?", "IFlows?", "mappings?", "adapters?"
+    ]
+    ico_pattern = r'~?\b(\d{1,5})\s*(?:' + "|".join(priority_keywords) + r')\b'
+    ico_matches = re.findall(ico_pattern, rfp_text, flags=re.IGNORECASE)
+    if ico_matches:
+        return max(map(int, ico_matches)), "ICOs"
+    pattern = r'~?\b(\d{1,5})\s*(?:' + "|".join(general_keywords) + r')\b'
+    matches = re.findall(pattern, rfp_text, flags=re.IGNORECASE)
+    if matches:
+        return max(map(int, matches)), "interfaces"
+    return None, None
+
+
+def best_of(func, arg, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for pages in args.pages:
+        text = synthetic_rfp(pages)
+        legacy_s, legacy = best_of(legacy_detect, text, args.repeat)
+        new_s, detection = best_of(detect_interfaces, text, args.repeat)
+        results.append({
+            "pages": pages, "chars": len(text),
+            "legacy_ms": round(legacy_s * 1000, 2), "detect_ms": round(new_s * 1000, 2),
+            "mentions": len(detection.matches),
+            "legacy_result": list(legacy), "detect_result": [detection.count, detection.kind],
+        })
+        print(f"{pages:>5} pages  legacy {legacy_s * 1000:8.2f} ms  detect {new_s * 1000:8.2f} ms  "
+              f"({len(detection.matches)} mentions)", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
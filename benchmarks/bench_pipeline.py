@@ -0,0 +1,237 @@
+"""
+Benchmark each pipeline stage offline against the local Azure OpenAI stand-in.
+
+Builds synthetic RFP PDFs and knowledge bases of synthetic proposal DOCX files,
+starts benchmarks/mock_openai.py in-process and times text extraction,
+interface detection, condensation, knowledge-base builds (Chroma and BM25),
+retrieval and section generation in each mode, and template rendering. Caches
+live in a temporary directory, so every run starts cold. Results go to stdout
+(and --output) as JSON for comparing releases.
+
+    python benchmarks/bench_pipeline.py [--pages 10 100 500] [--documents 1 100 1000] [--latency 0.2] [--tokens-per-second 1000] [--rate-429 0] [--output bench.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_openai import start_mock_server  # noqa: E402
+
+
+SENTENCES = [
+    "The client operates SAP ECC 6.0 with SAP PI/PO 7.5 as its integration middleware.",
+    "The vendor shall migrate all integration scenarios to SAP Integration Suite on BTP.",
+    "Interfaces use IDoc, SOAP, SFTP, REST and JDBC adapters across {n} connected systems.",
+    "The landscape contains approximately {n} ICOs grouped into finance, logistics and HR flows.",
+    "Testing covers unit, integration and regression cycles with documented evidence.",
+    "Cutover and hypercare must complete within {n} weeks of contract signature.",
+    "Value mappings, lookups and custom Java mappings must be converted or redesigned.",
+    "The bidder shall describe its governance model, staffing plan and communication approach.",
+    "Security requirements include certificate-based authentication and audit logging.",
+    "Monitoring shall be integrated with the client's existing alerting and ticketing tools.",
+]
+HEADINGS = ["Background", "Current Landscape", "Scope of Work", "Timeline", "Commercials", "Evaluation"]
+
+
+class NamedBytesIO(io.BytesIO):
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def synthetic_lines(pages, lines_per_page=45, seed=7):
+    """Pages of RFP-like lines (about 80 characters each) with headings and interface counts."""
+    rng = random.Random(seed)
+    out = []
+    for page in range(pages):
+        lines = [f"{page + 1}. {HEADINGS[page % len(HEADINGS)]}"]
+        words = []
+        while len(lines) < lines_per_page:
+            words += rng.choice(SENTENCES).format(n=rng.randint(5, 400)).split()
+            while len(" ".join(words)) > 80:
+                cut = max(i for i in range(1, len(words) + 1) if len(" ".join(words[:i])) <= 80)
+                lines.append(" ".join(words[:cut]))
+                words = words[cut:]
+        out.append(lines[:lines_per_page])
+    return out
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def synthetic_pdf(pages, seed=7):
+    """A minimal PDF (Helvetica text, one content stream per page) that PyPDF2 can extract."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in synthetic_lines(pages, seed=seed):
+        body = ["BT /F1 10 Tf 14 TL 50 800 Td"] + [f"({_pdf_escape(line)}) Tj T*" for line in lines] + ["ET"]
+        stream = "\n".join(body).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R"
+                       b" /Resources << /Font << /F1 3 0 R >> >> >>" % (len(objects)))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def write_knowledge_base(folder, documents, pages=2):
+    """documents proposal-like DOCX files with headings, paragraphs and a table."""
+    from docx import Document
+    os.makedirs(folder, exist_ok=True)
+    for i in range(documents):
+        doc = Document()
+        for page, lines in enumerate(synthetic_lines(pages, lines_per_page=20, seed=1000 * documents + i)):
+            doc.add_heading(lines[0], level=1)
+            doc.add_paragraph(" ".join(lines[1:10]))
+            doc.add_paragraph(" ".join(lines[10:]))
+        table = doc.add_table(rows=1, cols=3)
+        for cell, text in zip(table.rows[0].cells, ["Phase", "Duration", "Deliverables"]):
+            cell.text = text
+        for phase in ["Assessment", "Build", "Test", "Cutover"]:
+            for cell, text in zip(table.add_row().cells, [phase, f"{i % 6 + 2} weeks", f"{phase} sign-off"]):
+                cell.text = text
+        doc.save(os.path.join(folder, f"proposal_{i:04d}.docx"))
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 500], help="synthetic RFP sizes")
+    parser.add_argument("--documents", type=int, nargs="+", default=[1, 100, 1000], help="knowledge base sizes")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock seconds to first byte")
+    parser.add_argument("--tokens-per-second", type=float, default=1000.0, help="mock completion speed")
+    parser.add_argument("--completion-tokens", type=int, default=400, help="mock completion length")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of mock requests throttled")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary working directory")
+    args = parser.parse_args()
+
+    mock_config = {"latency": args.latency, "tokens_per_second": args.tokens_per_second,
+                   "completion_tokens": args.completion_tokens, "rate_429": args.rate_429, "retry_after_ms": 50}
+    server = start_mock_server(**mock_config)
+    workdir = tempfile.mkdtemp(prefix="rfp-bench-")
+    os.environ.update({
+        "AZURE_OPENAI_FRFP_ENDPOINT": server.url, "AZURE_OPENAI_FRFP_KEY": "mock",
+        "AZURE_OPENAI_FRFP_VERSION": "2024-02-01",
+        "AZURE_OPENAI_EMD_ENDPOINT": server.url, "AZURE_OPENAI_EMD_KEY": "mock",
+        "AZURE_OPENAI_EMD_VERSION": "2024-02-01",
+        "RFP_CACHE_DIR": os.path.join(workdir, "cache"), "RFP_RESPONSE_CACHE": "0",
+        "ANONYMIZED_TELEMETRY": "False", "RFP_EMBEDDING_CHECK_CTX_LENGTH": "0",  # no tiktoken download
+    })
+    # Imported after the environment is set: the modules read endpoints and cache paths at import time.
+    from Modules.condense import condense_rfp
+    from Modules.docx_template import insert_executive_summary_into_template
+    from Modules.extraction import extract_text
+    from Modules.generation import GENERATION_MODES, generate_sections
+    from Modules.interface_detection import detect_interfaces
+    from Modules.knowledge_base import build_knowledge_base, get_embedding_model
+    from Modules.lexical_index import build_lexical_index
+    from Modules.pipeline import TEMPLATE_PATH
+    from Modules.retrieval import RETRIEVAL_MODES, retrieve_reference_docs
+
+    results = []
+
+    def timed(stage, fn, **dims):
+        start = time.perf_counter()
+        stats = dict(server.stats)
+        row = {"stage": stage, **dims}
+        try:
+            value = fn()
+        except Exception as e:
+            value = None
+            row["error"] = f"{e.__class__.__name__}: {e}"
+        row["seconds"] = round(time.perf_counter() - start, 4)
+        row["api_calls"] = server.stats["chat"] + server.stats["embeddings"] - stats["chat"] - stats["embeddings"]
+        row["throttled"] = server.stats["throttled"] - stats["throttled"]
+        results.append(row)
+        size = ", ".join(f"{k}={v}" for k, v in dims.items())
+        status = row.get("error", "ok")[:60]
+        print(f"{stage:>18} {size:<16} {row['seconds']:9.3f} s  {row['api_calls']:4d} calls  {row['throttled']:3d} 429s  {status}", file=sys.stderr)
+        return value
+
+    try:
+        query_text = "\n\n".join("\n".join(lines) for lines in synthetic_lines(10))
+        passages = []
+        for documents in args.documents:
+            folder = os.path.join(workdir, f"kb_{documents}")
+            write_knowledge_base(folder, documents)
+            db = timed("kb_build", lambda: build_knowledge_base(folder, os.path.join(folder, "chroma"), get_embedding_model()),
+                       documents=documents)
+            lexical_index = timed("kb_build_lexical", lambda: build_lexical_index(folder, os.path.join(folder, "lexical")),
+                                  documents=documents)
+            for mode in RETRIEVAL_MODES:
+                store = db if mode != "lexical" else None
+                index = lexical_index if mode != "vector" else None
+                if (mode != "lexical" and store is None) or (mode != "vector" and index is None):
+                    results.append({"stage": f"retrieve_{mode}", "documents": documents, "error": "index unavailable"})
+                    continue
+                docs = timed(f"retrieve_{mode}", lambda: retrieve_reference_docs(store, query_text, lexical_index=index),
+                             documents=documents)
+                passages = [d.page_content for d in docs or []] or passages
+
+        for pages in args.pages:
+            pdf = synthetic_pdf(pages)
+            text = timed("extract_text", lambda: extract_text(NamedBytesIO(pdf, f"rfp_{pages}.pdf")), pages=pages) or ""
+            detection = timed("detect_interfaces", lambda: detect_interfaces(text), pages=pages)
+            condensed = timed("condense", lambda: condense_rfp(text), pages=pages) or text[:6000]
+            for mode in GENERATION_MODES:
+                sections = timed(f"generate_{mode}", lambda: {
+                    key: section for key, _, section, error in generate_sections(
+                        passages, condensed, detection.count if detection else None, mode=mode) if not error
+                }, pages=pages) or {}
+            if len(sections) == 4:
+                timed("render", lambda: insert_executive_summary_into_template(
+                    os.path.join(REPO_ROOT, TEMPLATE_PATH), *sections["exec_summary"], sections["scope"],
+                    sections["resource_schedule"], sections["communication_plan"]).save(io.BytesIO()), pages=pages)
+    finally:
+        server.shutdown()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "benchmark": "pipeline",
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock": mock_config,
+        "mock_stats": server.stats,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Local stand-in for the Azure OpenAI chat completions and embeddings endpoints.
+
+Answers /openai/deployments/<name>/chat/completions (streamed or not) and
+/openai/deployments/<name>/embeddings (plus the plain /v1/... paths) with
+canned proposal text and deterministic hashed bag-of-words vectors, after a
+configurable first-byte latency, at a configurable token rate and with a
+configurable share of 429 responses. Point the app at it with:
+
+    AZURE_OPENAI_FRFP_ENDPOINT=http://127.0.0.1:8765 AZURE_OPENAI_FRFP_KEY=x AZURE_OPENAI_FRFP_VERSION=2024-02-01
+    AZURE_OPENAI_EMD_ENDPOINT=http://127.0.0.1:8765 AZURE_OPENAI_EMD_KEY=x AZURE_OPENAI_EMD_VERSION=2024-02-01
+
+    python benchmarks/mock_openai.py [--port 8765] [--latency 0.5] [--tokens-per-second 50] [--rate-429 0.1]
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+DEFAULTS = {
+    "latency": 0.2,            # seconds before the first byte of every response
+    "tokens_per_second": 200.0,  # completion speed; 0 returns the whole completion at once
+    "rate_429": 0.0,           # share of requests answered with 429 Too Many Requests
+    "retry_after_ms": 200,     # retry-after-ms sent with each 429
+    "completion_tokens": 400,  # completion length, capped by the request's max_tokens
+    "embedding_dim": 1536,
+    "embedding_latency_per_input": 0.0005,
+    "seed": 7,
+}
+
+# Markdown in the shape the section prompts ask for, so splitting and rendering get realistic input.
+CANNED_COMPLETION = """**Executive Summary**
+The migration moves the SAP PI/PO 7.5 landscape to SAP Integration Suite on BTP in well-defined waves,
+reusing proven accelerators for interface assessment, mapping conversion and automated regression testing.
+
+**Objective**
+- Migrate all in-scope integration configuration objects with no change to business behaviour.
+- Decommission the on-premise middleware after hypercare.
+
+| Phase | Duration | Deliverables |
+| --- | --- | --- |
+| Assessment | 2 weeks | Interface inventory, migration waves |
+| Build | 8 weeks | IFlows, adapters, value mappings |
+| Test and cutover | 4 weeks | Test evidence, cutover runbook |
+
+- Governance through a weekly steering committee and daily stand-ups.
+- Risks tracked in a shared RAID log with named owners.
+"""
+_WORDS = re.compile(r"\S+\s*")
+_TOKEN = re.compile(r"\w+")
+
+
+def approximate_tokens(text):
+    """Rough OpenAI token count (about 4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def completion_text(tokens):
+    """The canned completion repeated or cut to roughly the given number of tokens (one word per token)."""
+    words = _WORDS.findall(CANNED_COMPLETION)
+    out = [words[i % len(words)] for i in range(max(1, tokens))]
+    return "".join(out)
+
+
+def structured_text(words, response_format):
+    """The completion words spread over the string fields of the requested JSON schema, as one JSON object."""
+    schema = (response_format.get("json_schema") or {}).get("schema") or {}
+    fields = list(schema.get("properties") or {"content": {}})
+    share = max(1, len(words) // len(fields))
+    return json.dumps({name: "".join(words[i * share:(i + 1) * share]).strip() or "-" for i, name in enumerate(fields)})
+
+
+def embed(value, dim):
+    """Unit vector of hashed word (or token ID) counts: similar texts get similar vectors."""
+    terms = [str(t) for t in value] if isinstance(value, list) else _TOKEN.findall(value.lower())
+    vector = np.zeros(dim, dtype=np.float32)
+    for term in terms:
+        h = int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+        vector[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0], norm = 1.0, 1.0
+    return vector / norm
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, MockOpenAIHandler)
+        self.config = {**DEFAULTS, **config}
+        self.random = random.Random(self.config["seed"])
+        self.stats = {"chat": 0, "embeddings": 0, "throttled": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def count(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    def throttle(self):
+        with self.lock:
+            return self.random.random() < self.config["rate_429"]
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)  # clients abandoning a stream is expected
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        config = self.server.config
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        path = self.path.split("?", 1)[0]
+        time.sleep(config["latency"])
+
+        if self.server.throttle():
+            self.server.count(throttled=1)
+            retry_ms = config["retry_after_ms"]
+            self._send_json(429, {"error": {"code": "429", "message": "Rate limit is exceeded (mock)."}},
+                            {"retry-after-ms": str(retry_ms), "retry-after": str(max(1, round(retry_ms / 1000)))})
+        elif path.endswith("/chat/completions"):
+            self._chat(request)
+        elif path.endswith("/embeddings"):
+            self._embeddings(request)
+        else:
+            self._send_json(404, {"error": {"code": "404", "message": f"Unknown path {path}"}})
+
+    def _chat(self, request):
+        config = self.server.config
+        prompt_tokens = sum(approximate_tokens(m.get("content") or "") for m in request.get("messages", []))
+        tokens = min(config["completion_tokens"], request.get("max_tokens") or config["completion_tokens"])
+        words = _WORDS.findall(completion_text(tokens))
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") in ("json_schema", "json_object"):
+            words = _WORDS.findall(structured_text(words, response_format))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                 "total_tokens": prompt_tokens + len(words)}
+        self.server.count(chat=1, prompt_tokens=prompt_tokens, completion_tokens=len(words))
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "created": int(time.time()),
+                "model": request.get("model", "mock")}
+        delay = 1.0 / config["tokens_per_second"] if config["tokens_per_second"] else 0.0
+
+        if not request.get("stream"):
+            time.sleep(delay * len(words))
+            self._send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [{
+                "index": 0, "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "".join(words)}}]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # Azure's first chunk carries no choices (prompt filter results).
+        events = [{**base, "object": "chat.completion.chunk", "choices": [], "prompt_filter_results": []}]
+        events += [{**base, "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]} for word in words]
+        events.append({**base, "object": "chat.completion.chunk",
+                       "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (request.get("stream_options") or {}).get("include_usage"):
+            events.append({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+        for i, event in enumerate(events):
+            if 0 < i <= len(words):
+                time.sleep(delay)
+            self._send_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    def _embeddings(self, request):
+        config = self.server.config
+        inputs = request.get("input", [])
+        # A single string, a list of strings, one token list or a list of token lists.
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        time.sleep(config["embedding_latency_per_input"] * len(inputs))
+        vectors = [embed(value, request.get("dimensions") or config["embedding_dim"]) for value in inputs]
+        tokens = sum(len(v) if isinstance(v, list) else approximate_tokens(v) for v in inputs)
+        self.server.count(embeddings=1, prompt_tokens=tokens)
+        as_base64 = request.get("encoding_format") == "base64"
+        self._send_json(200, {
+            "object": "list", "model": request.get("model", "mock"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            "data": [{"object": "embedding", "index": i,
+                      "embedding": base64.b64encode(v.astype("<f4").tobytes()).decode("ascii") if as_base64 else v.tolist()}
+                     for i, v in enumerate(vectors)],
+        })
+
+
+def start_mock_server(host="127.0.0.1", port=0, **config):
+    """Start the mock on a background thread (port 0 picks a free port); call .shutdown() when done."""
+    server = MockOpenAIServer((host, port), config)
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=DEFAULTS["latency"], help="seconds to first byte")
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULTS["tokens_per_second"])
+    parser.add_argument("--rate-429", type=float, default=DEFAULTS["rate_429"], help="share of requests throttled")
+    parser.add_argument("--retry-after-ms", type=int, default=DEFAULTS["retry_after_ms"])
+    parser.add_argument("--completion-tokens", type=int, default=DEFAULTS["completion_tokens"])
+    parser.add_argument("--embedding-dim", type=int, default=DEFAULTS["embedding_dim"])
+    args = parser.parse_args()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("host", "port")}
+    server = MockOpenAIServer((args.host, args.port), config)
+    print(f"🧪 Mock Azure OpenAI listening on {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats), file=sys.stderr)
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()